@@ -0,0 +1,53 @@
+"""
+# Reconstruct an archive from a local copy of its predecessor and a patch
+# constructed by &.diff.
+
+# Unchanged members are copied from the old archive without recompression.
+# The output replaces any existing file at its path atomically.
+"""
+import os
+import sys
+import json
+import contextlib
+
+from fault.system import process
+
+from .. import store as members
+from . import diff
+
+def apply(target, old, patch):
+	"""
+	# Write the archive described by &patch into &target using the members of &old.
+	"""
+	spec = json.loads(patch.read(diff.patch_name))
+	if diff.signature(diff.entries(old)) != spec['base']:
+		raise ValueError("patch was not constructed against the given archive")
+
+	changed = set(spec['changed'])
+	for name in spec['members']:
+		members.transfer(patch if name in changed else old, target, name)
+
+	aliases = {}
+	if members.aliases_name in spec['members']:
+		source = patch if members.aliases_name in changed else old
+		aliases = json.loads(source.read(members.aliases_name))
+	members.finish(target, aliases)
+
+	return len(changed), len(spec['members']) - len(changed)
+
+def main(inv:process.Invocation) -> process.Exit:
+	outstr, old, patch = inv.argv
+
+	# Written beside the output and renamed; the suffix selects the format.
+	d, f = os.path.split(outstr)
+	tmp = os.path.join(d, '.apply-' + f)
+
+	with contextlib.ExitStack() as stack:
+		o = stack.enter_context(members.open(old))
+		p = stack.enter_context(members.open(patch))
+		target = stack.enter_context(members.open(tmp, mode='w'))
+		changed, copied = apply(target, o, p)
+
+	os.replace(tmp, outstr)
+	sys.stderr.write("[apply] %d members from the patch, %d copied\n" %(changed, copied))
+	return inv.exit(0)
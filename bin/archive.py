@@ -2,12 +2,65 @@
 # Construct an archive for a Product's Internet Representation.
 
 # This provides the input used by &.daemon web partitions.
+
+# Archives whose path ends with `.pack` are written as a &..store.Pack
+# instead of a zip file. Zip files end with the member index read by &..store.Mapped.
+
+# [ Options ]
+# /`-j jobs`/
+	# Render factors using a pool of &jobs worker processes.
+	# The archive is written by the invoking process alone.
+# /`-I previous`/
+	# Incrementally build the archive using &previous, an archive produced by
+	# an earlier run. Factors whose inputs match the digests recorded in
+	# &previous have their members copied without recompression.
+# /`-c policy`/
+	# Select the compression policy used to store members: `fast`, `balanced`, or `compact`.
+	# Defaults to `balanced`. A summary of the compression performed is written to standard error.
+# /`-H partition`/
+	# Pre-render the HTML of chapters, factors, and indexes for serving by
+	# a &.daemon.Corpus partition at the &partition path.
+# /`-S style`/
+	# Name of a stylesheet configured in the serving partition's `.css` parameters.
+	# May be given multiple times; the order must match the partition's.
+# /`-X context`/
+	# The context name configured as the serving partition's first argument.
+# /`-s shard`/
+	# Build the shard identified by `index/count` into a partial archive.
+	# Projects are assigned to shards using the digest of their factor path,
+	# and partial archives are combined with &.merge.
+# /`-p project`/
+	# Build only the identified project into a partial archive.
+	# May be given multiple times.
+# /`-D`/
+	# Deduplicate the members of factors; members whose content has already
+	# been stored are recorded in the `.aliases.json` member and the member index
+	# as aliases of the stored member.
+# /`-T`/
+	# Store the parsed element tree of chapters in `.chapter.tree` members
+	# so that the daemon renders them without parsing the chapter text.
+# /`-M`/
+	# Construct the element trees of `-T` along with the chapter text using
+	# &..join.Composite rather than parsing the chapter text. Implies `-T`.
+# /`-K`/
+	# Use the array based &..join.CompactIndex for the element indexes of sources.
+# /`-C cache`/
+	# Use the database at &cache to hold the parsed documentation trees across builds.
+	# Created if it does not exist; see &..cache.Trees.
+# /`-R count`/
+	# Write the build profile to the `.profile.json` file next to the archive and
+	# summarize the &count most expensive factors and sources on standard error.
 """
 import os
+import sys
+import time
 import traceback
 import zipfile
 import contextlib
 import json
+import hashlib
+import collections
+import collections.abc
 
 from fault.context import tools
 from fault.context.types import Cell
@@ -17,6 +70,9 @@ from fault.system import process
 from fault.project import system as lsf
 
 from .. import join
+from .. import store as members
+from .. import cache
+from ..tools import parse, serialize
 
 def apath(*parts):
 	return '/'.join(parts)
@@ -30,9 +86,431 @@ def mkvariants(intention, system, architecture):
 		form='delineated',
 	)
 
-def r_factor(variants, archive, req, ctx, pj, pjdir, fpath, type, requirements, sources):
+# Option flag to configuration key and the form of its argument;
+# &None for flags, `'value'` for options taking an argument, and
+# `'list'` for options that may be repeated.
+option_identifiers = {
+	'-j': ('jobs', 'value'),
+	'-I': ('incremental', 'value'),
+	'-c': ('compression', 'value'),
+	'-H': ('partition', 'value'),
+	'-S': ('styles', 'list'),
+	'-X': ('context', 'value'),
+	'-R': ('profile', 'value'),
+	'-s': ('shard', 'value'),
+	'-p': ('projects', 'list'),
+	'-D': ('deduplicate', None),
+	'-T': ('trees', None),
+	'-M': ('structured', None),
+	'-C': ('cache', 'value'),
+	'-K': ('compact', None),
+}
+
+def options(argv):
+	"""
+	# Separate the leading options from the positional arguments in &argv.
+
+	# Raises &ValueError for unknown options and options missing their value.
+	"""
+	config = {
+		'jobs': 0,
+		'incremental': None,
+		'compression': 'balanced',
+		'partition': None,
+		'styles': [],
+		'context': '',
+		'profile': None,
+		'shard': None,
+		'projects': [],
+		'deduplicate': False,
+		'trees': False,
+		'structured': False,
+		'cache': None,
+		'compact': False,
+	}
+
+	i = 0
+	while i < len(argv) and argv[i][:1] == '-':
+		try:
+			key, form = option_identifiers[argv[i]]
+		except KeyError:
+			raise ValueError("unknown option: " + argv[i])
+
+		if form is None:
+			config[key] = True
+		else:
+			i += 1
+			if i == len(argv):
+				raise ValueError("option requires a value: " + argv[i-1])
+			elif form == 'list':
+				config[key].append(argv[i])
+			else:
+				config[key] = argv[i]
+		i += 1
+
+	config['jobs'] = int(config['jobs'])
+	if config['profile'] is not None:
+		config['profile'] = int(config['profile'])
+	if config['structured']:
+		config['trees'] = True
+	return config, argv[i:]
+
+def selectvariants(variant_s):
+	"""
+	# Construct the delineation variants from the `system/architecture` strings.
+	"""
+	return [
+		mkvariants('coverage', x[0], x[1]) for x in (
+			y.split('/') for y in variant_s
+		)
+	]
+
+def load(ctxpath):
+	"""
+	# Construct the project context and the dependency context of the product at &ctxpath.
+	"""
+	ctx = lsf.Context()
+	pd = ctx.connect(files.Path.from_absolute(ctxpath))
+	ctx.load()
+	ctx.configure()
+
+	req = ctx.from_product_connections(pd)
+	req.load()
+
+	return req, ctx
+
+def rendering(config):
+	"""
+	# Construct the HTML rendering parameters from the build &config.
+	# Identical to &.daemon.Corpus.cp_rendering of the serving partition.
+
+	# [ Returns ]
+	# &None if pre-rendering was not requested.
+	"""
+	partition = config['partition']
+	if partition is None:
+		return None
+
+	context = config['context']
+	return {
+		'prefix': context + '.' if context else '',
+		'partition': partition,
+		'styles': [partition + '.lib/' + x + '.css' for x in config['styles']],
+	}
+
+class Build(object):
+	"""
+	# The contexts and configuration shared by the factors of an archive build.
+	"""
+
+	def __init__(self, config, ctxpath, variant_s):
+		self.config = config
+		self.ctxpath = ctxpath
+		self.variant_s = variant_s
+
+		# Build project context for the target product
+		# and construct the dependency context.
+		self.req, self.ctx = load(ctxpath)
+		self.variants = selectvariants(variant_s)
+		self.policy = members.Policy(**members.policies[config['compression']])
+		self.rendering = rendering(config)
+
+		# Totals of the &join.Resolution.statistics of the rendered sources.
+		self.resolution = collections.Counter()
+		self.profile = Profile()
+		self.images = Images()
+		self.aliases = members.Aliases() if config['deduplicate'] else None
+		self.cache = cache.Trees(config['cache']) if config['cache'] else None
+		self.indexer = join.CompactIndex if config['compact'] else join.index
+
+class Profile(object):
+	"""
+	# The measured cost of building the factors and sources of an archive.
+
+	# [ Properties ]
+	# /entries/
+		# Measurements keyed by the member set path of the factor or source.
+		# Members outside of any registered set are recorded in the entry
+		# of the empty path.
+	"""
+
+	fields = (
+		'scan', 'transform', 'compression',
+		'resolved', 'invalid',
+		'members', 'size', 'csize',
+	)
+
+	def __init__(self):
+		self.entries = {}
+
+	def entry(self, path, project=None, factor=None, source=None):
+		"""
+		# Retrieve or create the entry for the member set &path.
+		"""
+		e = self.entries.get(path)
+		if e is None:
+			e = self.entries[path] = dict.fromkeys(self.fields, 0)
+			e['project'] = project
+			e['factor'] = factor
+			e['source'] = source
+		return e
+
+	def member(self, info, elapsed):
+		"""
+		# Record the member described by &info in the entry of its member set.
+		"""
+		prefix = info.filename
+		while prefix:
+			prefix = prefix[:max(prefix.rfind('/'), 0)]
+			if prefix in self.entries:
+				break
+
+		e = self.entry(prefix)
+		e['members'] += 1
+		e['size'] += info.file_size
+		e['csize'] += info.compress_size
+		e['compression'] += elapsed
+
+	@staticmethod
+	def cost(e):
+		return e['scan'] + e['transform'] + e['compression']
+
+	def aggregate(self):
+		"""
+		# Construct the totals of the factors and projects.
+
+		# [ Returns ]
+		# The lists of source, factor, and project records
+		# each ordered by descending &cost.
+		"""
+		sources = []
+		factors = {}
+		projects = {}
+
+		for path, e in self.entries.items():
+			if e['source'] is not None:
+				sources.append(dict(e, path=path))
+
+			if e['factor'] is not None:
+				fkey = (e['project'], e['factor'])
+				f = factors.get(fkey)
+				if f is None:
+					f = factors[fkey] = dict.fromkeys(self.fields, 0)
+					f.update(project=e['project'], factor=e['factor'], sources=0)
+				for k in self.fields:
+					f[k] += e[k]
+				if e['source'] is not None:
+					f['sources'] += 1
+
+			if e['project'] is not None:
+				p = projects.get(e['project'])
+				if p is None:
+					p = projects[e['project']] = dict.fromkeys(self.fields, 0)
+					p.update(project=e['project'])
+				for k in self.fields:
+					p[k] += e[k]
+
+		order = (lambda x: sorted(x, key=self.cost, reverse=True))
+		return order(sources), order(factors.values()), order(projects.values())
+
+	def report(self, count):
+		"""
+		# Produce the lines summarizing the &count most expensive factors and sources.
+		"""
+		sources, factors, projects = self.aggregate()
+
+		for title, records, name in [
+			('factors', factors, (lambda x: x['project'] + '/' + x['factor'])),
+			('sources', sources, (lambda x: x['path'])),
+		]:
+			yield "[archive] most expensive %s:\n" %(title,)
+			for x in records[:count]:
+				yield "%9.3fs %s (scan %.3fs, transform %.3fs, compression %.3fs, " \
+					"%d references, %d invalid, %d -> %d bytes)\n" %(
+					self.cost(x), name(x), x['scan'], x['transform'], x['compression'],
+					x['resolved'], x['invalid'], x['size'], x['csize'],
+				)
+
+	def json(self):
+		"""
+		# Serialize the measurements of the projects, factors, and sources.
+		"""
+		sources, factors, projects = self.aggregate()
+		return json.dumps({
+			'projects': projects,
+			'factors': factors,
+			'sources': sources,
+		}, indent=1)
+
+def r_html(rendering, depth, type, identifier, chapter):
+	"""
+	# Render the &chapter as an HTML document served at &depth.
+	"""
+	from .. import daemon
+	return b''.join(daemon.render_factor_html(
+		rendering['prefix'], depth, rendering['styles'],
+		type, identifier, chapter
+	))
+
+def r_index(rendering, name, *args):
+	"""
+	# Render an index page using the &.daemon function identified by &name.
+	"""
+	from .. import daemon
+	from fault.web import xml
+	sx = xml.Serialization(xml_encoding='utf-8')
+	return b''.join(getattr(daemon, name)(sx, rendering['styles'], *args))
+
+class Images(object):
+	"""
+	# Delineation image discovery using cached &os.scandir listings.
+
+	# Each directory is listed once and the types of its entries are taken
+	# from the listing, so queries about the images of factors and sources
+	# are answered without calling &os.stat.
+
+	# [ Properties ]
+	# /directories/
+		# The listings of the scanned directories associating entry names
+		# with whether they are directories; &None for absent directories.
+	# /scans/
+		# The number of directories listed.
+	# /saved/
+		# The number of stat calls the path interfaces would have performed
+		# to answer the queries made.
+	"""
+
+	def __init__(self):
+		self.directories = {}
+		self.scans = 0
+		self.saved = 0
+
+	def scan(self, path:str):
+		"""
+		# Retrieve the listing of the directory at &path.
+		"""
+		try:
+			return self.directories[path]
+		except KeyError:
+			pass
+
+		try:
+			with os.scandir(path) as entries:
+				listing = {x.name: x.is_dir() for x in entries}
+		except (FileNotFoundError, NotADirectoryError):
+			listing = None
+
+		self.scans += 1
+		self.directories[path] = listing
+		return listing
+
+	def isdirectory(self, path:str) -> bool:
+		"""
+		# Whether &path is a directory according to the listing of its parent.
+		"""
+		self.saved += 1
+		parent, name = os.path.split(path)
+		listing = self.scan(parent)
+		return listing is not None and listing.get(name, False)
+
+	def image(self, variants, pj, fpath):
+		"""
+		# Identify the delineation image of the factor &fpath using the first
+		# of the &variants that has one.
+
+		# [ Returns ]
+		# The image directory or &None if there is no image.
+		"""
+		for v in variants:
+			img = pj.image(v, fpath)
+			if self.isdirectory(str(img)):
+				return img
+
+		return None
+
+	def files(self, path:str):
+		"""
+		# List the files within the directory &path, recursively.
+
+		# [ Returns ]
+		# A sorted list of the file paths relative to &path as tuples of segments;
+		# &None if &path is not a directory.
+		"""
+		if not self.isdirectory(path):
+			return None
+
+		found = []
+		stack = [()]
+		while stack:
+			rpath = stack.pop()
+			listing = self.scan(os.path.join(path, *rpath))
+			for name, isdir in listing.items():
+				self.saved += 1
+				if isdir:
+					stack.append(rpath + (name,))
+				else:
+					found.append(rpath + (name,))
+
+		found.sort()
+		return found
+
+	def report(self):
+		"""
+		# Produce the line summarizing the discovery performed.
+		"""
+		yield "[archive] image discovery: %d directories scanned, %d stat calls saved\n" %(
+			self.scans, self.saved
+		)
+
+class Chapter(object):
+	"""
+	# Iterator over the text of a chapter recording the time spent producing it.
+	"""
+
+	def __init__(self, iterator):
+		self.iterator = iterator
+		self.elapsed = 0.0
+
+	def __iter__(self):
+		return self
+
+	def __next__(self):
+		start = time.perf_counter()
+		try:
+			return next(self.iterator)
+		finally:
+			self.elapsed += time.perf_counter() - start
+
+def r_chapter(build, rr, srcdir, source):
+	"""
+	# Generate the chapter text of &source.
+	# Errors are raised to &encode, which leaves the member out of the archive.
+	"""
+	yield from join.transform(rr, srcdir, source, stream=True, batch=True, cache=build.cache)
+
+def r_resolution(build, entry, rr, previous):
+	"""
+	# Add the &join.Resolution.statistics counted by &rr since &previous
+	# to the &build totals and the profile &entry.
+	"""
+	counts = rr.statistics - previous
+	build.resolution.update(counts)
+	entry['resolved'] += counts['hits'] + counts['misses']
+	entry['invalid'] += counts['invalid']
+
+def r_factor(build, pj, pjdir, fpath, type, requirements, sources):
+	"""
+	# Generate the archive members of a factor.
+
+	# Produces pairs whose first item is the member path and second is either
+	# the &bytes to store, the path of the file to copy into the archive, or
+	# an iterator producing the text of the member.
+	"""
 	# project/factor
 	outset = apath(pjdir, str(fpath))
+	identifier = pjdir + '.' + str(fpath)
+	rendering = build.rendering
+	fentry = build.profile.entry(outset, pjdir, str(fpath))
 
 	meta = apath(outset, '.meta.json')
 	if isinstance(sources, Cell):
@@ -44,17 +522,22 @@ def r_factor(variants, archive, req, ctx, pj, pjdir, fpath, type, requirements,
 		meta_prefix = True
 		primary = ""
 	meta_json = json.dumps([meta_prefix, primary, str(type)]).encode('utf-8')
-	archive.writestr(meta, meta_json)
+	yield (meta, meta_json)
 
-	for v in variants:
-		img = pj.image(v, fpath)
-		if img.fs_type() == 'directory':
-			break
-	else:
+	start = time.perf_counter()
+	img = build.images.image(build.variants, pj, fpath)
+	fentry['scan'] += time.perf_counter() - start
+	if img is None:
 		# No image.
-		return ""
+		return
+
+	# Shared by the sources so that context and project references
+	# resolved for one source are not resolved again for the next.
+	# Each source installs its own element index.
+	rr = join.Resolution(build.req, build.ctx, pj, fpath, indexer=build.indexer)
 
 	srcindex = []
+	chapters = []
 	for x in (x[1] for x in sources):
 		# Calculate path to delineation image.
 		rpath = x.points
@@ -62,40 +545,446 @@ def r_factor(variants, archive, req, ctx, pj, pjdir, fpath, type, requirements,
 		srcindex.append(x.points)
 		srcdir = img + rpath
 		outsrc = apath(outset, *rpath)
+		sentry = build.profile.entry(outsrc, pjdir, str(fpath), '/'.join(rpath))
+		chapter = None
 
-		if srcdir.fs_type() == 'directory':
+		start = time.perf_counter()
+		srcstr = str(srcdir)
+		image = build.images.files(srcstr)
+		sentry['scan'] += time.perf_counter() - start
+
+		if image is not None:
 			# Copy the contents of the delineation image.
-			for dirpath, files in srcdir.fs_index():
-				for f in files:
-					path = f.segment(srcdir)
-					archive.write(str(f), apath(outsrc, *path))
+			for path in image:
+				yield (apath(outsrc, *path), os.path.join(srcstr, *path))
 
 			outtxt = apath(outsrc, '.chapter.txt')
+			previous = rr.statistics.copy()
+
+			if rendering is None and not build.config['trees']:
+				# Only the archive needs the chapter; stream it.
+				stream = Chapter(r_chapter(build, rr, srcdir, x))
+				yield (outtxt, stream)
+				sentry['transform'] += stream.elapsed
+				r_resolution(build, sentry, rr, previous)
+
+				srctxt = apath(outsrc, 'source.txt')
+				yield (srctxt, x)
+				continue
+
+			tree = None
 			try:
-				rr = join.Resolution(req, ctx, pj, fpath)
-				archive.writestr(outtxt, ''.join(join.transform(rr, srcdir, x)))
+				start = time.perf_counter()
+				if build.config['structured']:
+					# Text and tree from a single load and traversal.
+					chapter, tree = join.composite(rr, srcdir, x, stream=True, batch=True, cache=build.cache)
+				else:
+					chapter = ''.join(join.transform(rr, srcdir, x, stream=True, batch=True, cache=build.cache))
 			except Exception:
 				traceback.print_exc()
+			else:
+				sentry['transform'] += time.perf_counter() - start
+				r_resolution(build, sentry, rr, previous)
+				yield (outtxt, chapter.encode('utf-8'))
+
+				if build.config['trees']:
+					try:
+						if tree is None:
+							tree = parse(chapter)
+						yield (apath(outsrc, '.chapter.tree'), serialize(tree))
+					except Exception:
+						traceback.print_exc()
 
+				if rendering is not None:
+					# Served at project/factor/source.
+					try:
+						html = r_html(rendering, len(rpath) + 1, str(type), identifier,
+							chapter if tree is None else tree)
+					except Exception:
+						traceback.print_exc()
+					else:
+						yield (apath(outsrc, '.chapter.html'), html)
+
+		chapters.append(chapter)
 		srctxt = apath(outsrc, 'source.txt')
-		archive.write(str(x), srctxt)
+		yield (srctxt, x)
+
+	yield (apath(outset, '.index.json'), json.dumps(srcindex).encode('utf-8'))
+
+	if rendering is not None:
+		yield (apath(outset, '.sources.html'), r_index(rendering, 'r_source_index', identifier, srcindex))
+
+		# Catenated chapters as served at project/factor.
+		if None not in chapters:
+			try:
+				html = r_html(rendering, 1, str(type), identifier, "\n[]\n".join(chapters))
+			except Exception:
+				traceback.print_exc()
+			else:
+				yield (apath(outset, '.factor.html'), html)
+
+def encode(policy, path, data, aliases=None, omit=True):
+	"""
+	# Compress a member produced by &r_factor using the method selected by &policy.
 
-	archive.writestr(apath(outset, '.index.json'), json.dumps(srcindex))
-	return ""
+	# When &aliases is given, the digest of the content is identified and, if &omit
+	# is true, members whose content has already been encoded are not compressed.
+	# Workers do not &omit duplicates as the members encoded by one are not
+	# necessarily inserted in the same order. Streamed members are never deduplicated.
 
-def r_project(variants, archive, req:lsf.Context, ctx:lsf.Context, pj:lsf.Project):
-	# Currently hardcoded.
-	pjdir = str(pj.factor)
+	# Iterators are compressed as their text is produced; if producing the text
+	# fails, the error is reported and the member is not encoded.
+
+	# [ Returns ]
+	# The &zipfile.ZipInfo describing the member, the compressed data or &None
+	# for a duplicate, the compression level used, the time spent, and the digest
+	# of the content or &None when not deduplicating. &None if the member failed.
+	"""
+	start = time.perf_counter()
+
+	if isinstance(data, collections.abc.Iterator):
+		info = zipfile.ZipInfo(path, time.localtime(time.time())[:6])
+		info.external_attr = 0o600 << 16
+		method, level = policy.select(path, None)
+		try:
+			cdata = members.compress_text(info, data, method, level)
+		except Exception:
+			traceback.print_exc()
+			return None
+		# Exclude the time spent producing the text.
+		return info, cdata, level, time.perf_counter() - start - getattr(data, 'elapsed', 0.0), None
+	elif isinstance(data, bytes):
+		info = zipfile.ZipInfo(path, time.localtime(time.time())[:6])
+		info.external_attr = 0o600 << 16
+	else:
+		info = zipfile.ZipInfo.from_file(str(data), path)
+		with open(str(data), 'rb') as f:
+			data = f.read()
+
+	digest = None
+	if aliases is not None:
+		digest = aliases.digest(data)
+		if omit:
+			if digest in aliases.members:
+				# Stored once; recorded as an alias by &insert.
+				info.file_size = len(data)
+				return info, None, None, time.perf_counter() - start, digest
+			aliases.members[digest] = path
+
+	method, level = policy.select(path, len(data))
+	cdata = members.compress(info, data, method, level)
+
+	return info, cdata, level, time.perf_counter() - start, digest
+
+def insert(archive, policy, encoded, profile=None, aliases=None):
+	"""
+	# Write the &encoded members into &archive.
+
+	# Members with a digest are recorded in &aliases, and only
+	# the first with a given digest is written.
+
+	# [ Returns ]
+	# The list of member paths written or aliased.
+	"""
+	written = []
+	for info, cdata, level, elapsed, digest in encoded:
+		if digest is not None:
+			if aliases.identify(info.filename, digest, info.file_size) is not None:
+				written.append(info.filename)
+				continue
+			elif cdata is None:
+				raise RuntimeError("duplicate member encoded before the original: " + info.filename)
+
+		members.insert(archive, info, cdata)
+		policy.record(info, level, elapsed)
+		if profile is not None:
+			profile.member(info, elapsed)
+		written.append(info.filename)
+	return written
+
+def store(archive, policy, fmembers, profile=None, aliases=None):
+	"""
+	# Write the &fmembers produced by &r_factor into &archive.
+
+	# Iterators are compressed as they are produced so that the text
+	# of the member is never held in memory in its entirety, and the
+	# member is only written once the text has been completed.
+
+	# [ Returns ]
+	# The list of member paths written.
+	"""
+	written = []
+	for path, data in fmembers:
+		encoded = encode(policy, path, data, aliases)
+		if encoded is not None:
+			written.extend(insert(archive, policy, [encoded], profile, aliases))
+
+	return written
+
+def partition(projects, shard=None, selection=()):
+	"""
+	# Identify the &projects built by the &shard, an `index/count` string,
+	# and limited to the project factor paths in &selection, if any.
+
+	# The assignment depends only on the project's factor path, so
+	# every shard of a build agrees on it.
+	"""
+	if selection:
+		selection = set(selection)
+		projects = [pj for pj in projects if str(pj.factor) in selection]
+
+	if shard is not None:
+		i, n = map(int, shard.split('/'))
+		if not 0 <= i < n:
+			raise ValueError("shard index must be less than the shard count: " + shard)
+
+		projects = [
+			pj for pj in projects
+			if int(hashlib.sha256(str(pj.factor).encode('utf-8')).hexdigest()[:8], 16) % n == i
+		]
+
+	return projects
+
+def select(projects):
+	"""
+	# Identify the factors of &projects.
+
+	# [ Returns ]
+	# The list of factor descriptors used to render each factor, and
+	# the project indexes to be written once the factors have been stored.
+	"""
 	factors = []
+	indexes = []
+	for pj in projects:
+		# Currently hardcoded.
+		pjdir = str(pj.factor)
+		pjidx = []
+		for ((path, type), (reqs, sources)) in pj.select(lsf.types.factor):
+			pjidx.append((str(path), str(type), ""))
+			factors.append((pj, pjdir, path, type, reqs, sources))
+		indexes.append((pjdir, pjidx))
+
+	return factors, indexes
+
+# Options changing the members written for a factor.
+signed = ('trees', 'structured', 'deduplicate')
+
+def signature(build):
+	"""
+	# Construct the digest of the contexts and configuration shared by all factors.
+
+	# Covers the factor paths of all the projects as any of them may be
+	# the target of a reference made by a factor, and the &signed options.
+	"""
+	h = hashlib.sha256()
+	for x in build.variant_s:
+		h.update(x.encode('utf-8') + b'\0')
+	for c in (build.ctx, build.req):
+		for pj in c.iterprojects():
+			h.update(str(pj.factor).encode('utf-8') + b'\0')
+			h.update(str(pj.identifier).encode('utf-8') + b'\0')
+
+			# References are resolved against the factors of every project.
+			for fpath in sorted(str(x[0][0]) for x in pj.select(lsf.types.factor)):
+				h.update(b'\2' + fpath.encode('utf-8') + b'\0')
+		h.update(b'\1')
+	h.update(json.dumps(build.rendering, sort_keys=True).encode('utf-8'))
+	h.update(json.dumps([build.config[k] for k in signed]).encode('utf-8'))
+
+	return h.hexdigest()
+
+def f_digest(images, variants, common, pj, fpath, type, requirements, sources):
+	"""
+	# Construct the digest of the inputs of a factor.
+
+	# Covers the &common context digest, the factor's type and requirements,
+	# its source files, and the files of its delineation image.
+	"""
+	h = hashlib.sha256(common.encode('utf-8'))
+	h.update(str(type).encode('utf-8') + b'\0')
+	h.update(b'Cell' if isinstance(sources, Cell) else b'Set')
+	for r in requirements:
+		h.update(str(r).encode('utf-8') + b'\0')
+
+	img = images.image(variants, pj, fpath)
+
+	for x in (x[1] for x in sources):
+		h.update(b'\2' + '/'.join(x.points).encode('utf-8') + b'\0')
+		h.update(x.fs_load())
+
+		if img is None:
+			continue
+
+		srcstr = str(img + x.points)
+		for path in (images.files(srcstr) or ()):
+			h.update(b'\3' + '/'.join(path).encode('utf-8') + b'\0')
+			with open(os.path.join(srcstr, *path), 'rb') as f:
+				h.update(f.read())
+
+	return h.hexdigest()
+
+def recorded(manifest, available, outset):
+	"""
+	# Identify the digest recorded in the &manifest of the previous archive
+	# for the factor &outset when all of its members are &available.
+
+	# [ Returns ]
+	# The digest and member paths or &None when the factor cannot be reused.
+	"""
+	try:
+		digest, names = manifest[outset]
+	except (KeyError, ValueError):
+		return None
+
+	if not available.issuperset(names):
+		return None
+	return digest, names
+
+def r_serial(build, archive, factors, common, previous=None, manifest={}):
+	"""
+	# Render and store the &factors using the invoking process.
+
+	# Factors whose digest matches the one recorded in the &manifest of the
+	# &previous archive have their members copied instead of rendered.
+
+	# [ Returns ]
+	# Dictionary associating the factor's member set path with its digest and
+	# the member paths written, and the number of factors reused.
+	"""
+	written = {}
+	reused = 0
+	available = set(previous.namelist()) if previous is not None else set()
+
+	for pj, pjdir, path, type, reqs, sources in factors:
+		outset = apath(pjdir, str(path))
+		digest = f_digest(build.images, build.variants, common, pj, path, type, reqs, sources)
+
+		r = recorded(manifest, available, outset)
+		if r is not None and r[0] == digest:
+			for name in r[1]:
+				members.transfer(previous, archive, name)
+			written[outset] = r
+			reused += 1
+			continue
+
+		fmembers = r_factor(build, pj, pjdir, path, type, reqs, sources)
+		written[outset] = (digest, store(archive, build.policy, fmembers, build.profile, build.aliases))
+
+	return written, reused
+
+def weight(sources):
+	"""
+	# Estimate the rendering cost of a factor using the size of its sources.
+	"""
+	total = 0
+	for x in sources:
+		try:
+			total += os.stat(str(x[1])).st_size
+		except OSError:
+			pass
+	return total
+
+# Worker process state initialized by &w_initialize.
+_worker = None
+
+def w_initialize(config, ctxpath, variant_s, common):
+	"""
+	# Load the contexts used by a worker process.
+	"""
+	global _worker
+
+	build = Build(config, ctxpath, variant_s)
+	projects = {str(pj.factor): pj for pj in build.ctx.iterprojects()}
+	_worker = (build, projects, common)
+
+def w_factor(project, factor, previous=None):
+	"""
+	# Render and compress the identified &factor of &project in a worker process.
+
+	# When the digest of the factor's inputs is &previous, the factor
+	# is not rendered and &None is returned in place of its members.
+	"""
+	build, projects, common = _worker
+	pj = projects[project]
+	build.resolution.clear()
+	build.profile.entries.clear()
 
 	for ((path, type), (reqs, sources)) in pj.select(lsf.types.factor):
-		summary = r_factor(variants, archive, req, ctx, pj, pjdir, path, type, reqs, sources)
-		factors.append((str(path), str(type), summary))
+		if str(path) == factor:
+			break
+	else:
+		raise LookupError("factor not present in project: " + factor)
+
+	outset = apath(project, factor)
+	digest = f_digest(build.images, build.variants, common, pj, path, type, reqs, sources)
+	if digest == previous:
+		return outset, digest, None, {}, {}
+
+	encoded = [
+		x for x in (
+			encode(build.policy, mpath, data, build.aliases, omit=False)
+			for mpath, data in r_factor(build, pj, project, path, type, reqs, sources)
+		)
+		if x is not None
+	]
+	if build.cache is not None:
+		build.cache.flush()
+
+	return outset, digest, encoded, dict(build.resolution), build.profile.entries
+
+def r_parallel(build, archive, factors, common, previous=None, manifest={}):
+	"""
+	# Render the &factors using a pool of worker processes
+	# writing the produced members into &archive as they complete.
+
+	# Factors are dispatched in descending size order. Members are
+	# compressed by the workers and inserted into the archive without
+	# further processing; with &Build.aliases, duplicates are dropped by
+	# &insert as they arrive. The workers compute the digests of the factors
+	# and those matching the one recorded in the &manifest of the &previous
+	# archive have their members copied instead.
+
+	# [ Returns ]
+	# Dictionary associating the factor's member set path with its digest and
+	# the member paths written, and the number of factors reused.
+	"""
+	from concurrent.futures import ProcessPoolExecutor, as_completed
+
+	available = set(previous.namelist()) if previous is not None else set()
+	tasks = []
+	for pj, pjdir, path, type, reqs, sources in factors:
+		fpath = str(path)
+		r = recorded(manifest, available, apath(pjdir, fpath))
+		tasks.append((weight(sources), pjdir, fpath, r))
+	tasks.sort(key=(lambda x: x[0]), reverse=True)
+
+	written = {}
+	reused = 0
+	initargs = (build.config, build.ctxpath, build.variant_s, common)
+	with ProcessPoolExecutor(build.config['jobs'], initializer=w_initialize, initargs=initargs) as pool:
+		pending = {
+			pool.submit(w_factor, pjdir, fpath, r[0] if r is not None else None): r
+			for w, pjdir, fpath, r in tasks
+		}
+		for f in as_completed(pending):
+			outset, digest, encoded, resolution, profile = f.result()
+			if encoded is None:
+				names = pending[f][1]
+				for name in names:
+					members.transfer(previous, archive, name)
+				written[outset] = (digest, names)
+				reused += 1
+				continue
+
+			build.resolution.update(resolution)
+			build.profile.entries.update(profile)
+			written[outset] = (digest, insert(archive, build.policy, encoded, build.profile, build.aliases))
 
-	archive.writestr(apath(pjdir, '.index.json'), json.dumps(factors))
+	return written, reused
 
-def archive(output, input):
+def archive(output, input, policy=None):
 	import os.path
+	policy = policy or members.Policy(**members.policies['compact'])
 	zf = zipfile.ZipFile(str(output), mode='w', compression=zipfile.ZIP_DEFLATED, compresslevel=9)
 	with zf:
 		istr = str(input)
@@ -105,7 +994,8 @@ def archive(output, input):
 		for root, dirs, files in os.walk(istr):
 			for file in files:
 				ipath = os.path.join(root, file)
-				zf.write(ipath, arcname=ipath[plen:])
+				method, level = policy.select(file, os.path.getsize(ipath))
+				zf.write(ipath, arcname=ipath[plen:], compress_type=method, compresslevel=level)
 
 def first_sentence(p):
 	for x in p.sentences:
@@ -117,32 +1007,64 @@ def first_sentence(p):
 	# None detected, presume single sentence abstract.
 	return ''.join(y[1] for y in p)
 
+# Exit status for invalid arguments.
+usage_status = 64
+
 def main(inv:process.Invocation) -> process.Exit:
-	outstr, ctxpath, *variant_s = inv.argv
+	try:
+		config, argv = options(inv.argv)
+		if len(argv) < 2:
+			raise ValueError("usage: [options] output context [variant ...]")
+	except ValueError as err:
+		sys.stderr.write("[archive] " + str(err) + "\n")
+		return inv.exit(usage_status)
+	outstr, ctxpath, *variant_s = argv
 
-	# Build project context for the target product.
-	ctx = lsf.Context()
-	pd = ctx.connect(files.Path.from_absolute(ctxpath))
-	ctx.load()
-	ctx.configure()
+	build = Build(config, ctxpath, variant_s)
+	policy = build.policy
+	rendering = build.rendering
 
-	# Construct dependency context.
-	req = ctx.from_product_connections(pd)
-	req.load()
+	out = files.Path.from_path(outstr)
+	projects = partition(list(build.ctx.iterprojects()), config['shard'], config['projects'])
+	factors, indexes = select(projects)
 
-	variants = [
-		mkvariants('coverage', x[0], x[1]) for x in (
-			y.split('/') for y in variant_s
-		)
-	]
+	# Digests of the factors' inputs are computed as the factors are processed
+	# and recorded in every archive so that subsequent builds can be incremental.
+	common = signature(build)
 
-	out = files.Path.from_path(outstr)
-	arc = zipfile.ZipFile(str(out), mode='w', compression=zipfile.ZIP_DEFLATED, compresslevel=9)
-	with arc:
-		projects = []
-		for pj in ctx.iterprojects():
-			r_project(variants, arc, req, ctx, pj)
-			projects.append(pj)
+	if config['incremental'] is not None:
+		if os.path.realpath(config['incremental']) == os.path.realpath(outstr):
+			raise ValueError("previous archive must not be the output archive")
+
+		previous = members.open(config['incremental'])
+		try:
+			manifest = json.loads(previous.read('.digests.json'))
+		except KeyError:
+			manifest = {}
+	else:
+		previous = None
+		manifest = {}
+
+	arc = members.open(str(out), mode='w')
+	with arc, (previous or contextlib.nullcontext()):
+		if config['jobs'] > 0:
+			written, reused = r_parallel(build, arc, factors, common, previous, manifest)
+		else:
+			written, reused = r_serial(build, arc, factors, common, previous, manifest)
+
+		if previous is not None:
+			sys.stderr.write("[archive] %d factors reused, %d rendered\n" %(reused, len(written) - reused))
+
+		for pjdir, pjidx in indexes:
+			build.profile.entry(pjdir, pjdir)
+		store(arc, policy, [
+			(apath(pjdir, '.index.json'), json.dumps(pjidx).encode('utf-8'))
+			for pjdir, pjidx in indexes
+		], build.profile)
+
+		store(arc, policy, [('.digests.json', json.dumps(
+			written, sort_keys=True
+		).encode('utf-8'))], build.profile)
 
 		pjidx = [
 			(
@@ -154,6 +1076,43 @@ def main(inv:process.Invocation) -> process.Exit:
 			)
 			for pj in projects
 		]
-		arc.writestr('.index.json', json.dumps(pjidx, ensure_ascii=False))
+		pjidx_json = json.dumps(pjidx, ensure_ascii=False)
+		store(arc, policy, [('.index.json', pjidx_json.encode('utf-8'))], build.profile)
+
+		if rendering is not None:
+			store(arc, policy, [
+				(apath(pjdir, '.index.html'), r_index(rendering, 'r_factor_index', rendering['partition'], pjdir, pjidx))
+				for pjdir, pjidx in indexes
+			], build.profile)
+
+			# Rendered from the stored form as the daemon would.
+			store(arc, policy, [
+				('.index.html', r_index(rendering, 'r_project_index',
+					rendering['prefix'], rendering['partition'], json.loads(pjidx_json))),
+				('.html.json', json.dumps(rendering).encode('utf-8')),
+			], build.profile)
+
+		if build.aliases is not None:
+			store(arc, policy, [
+				(members.aliases_name, json.dumps(build.aliases.names, sort_keys=True).encode('utf-8')),
+			], build.profile)
+			members.finish(arc, build.aliases.names)
+		else:
+			members.finish(arc)
 
+	sys.stderr.writelines(policy.report())
+	sys.stderr.writelines(build.images.report())
+	if build.aliases is not None:
+		sys.stderr.writelines(build.aliases.report())
+	if build.cache is not None:
+		build.cache.flush()
+		sys.stderr.writelines(build.cache.report())
+		build.cache.close()
+	if config['profile'] is not None:
+		with open(outstr + '.profile.json', 'w') as f:
+			f.write(build.profile.json())
+		sys.stderr.writelines(build.profile.report(config['profile']))
+	sys.stderr.write("[archive] reference resolution: " + ", ".join(
+		"%s=%d" %(k, v) for k, v in sorted(build.resolution.items())
+	) + "\n")
 	return inv.exit(0)
@@ -0,0 +1,107 @@
+"""
+# Fold delta archives into a corpus archive.
+
+# Constructs the &..store.Overlay of the base archive and the deltas served by
+# &..daemon.Corpus and writes its members into a new archive without recompression.
+# The output replaces any existing file at its path atomically, so the base archive
+# may be compacted in place while being served.
+
+# [ Options ]
+# /`-c policy`/
+	# Select the compression policy used to store the constructed members.
+# /`-r`/
+	# Remove the deltas once the output is in place; served corpora
+	# reload when their applied deltas are removed.
+"""
+import os
+import sys
+import json
+import contextlib
+
+from fault.system import process
+
+from .. import store as members
+from . import archive
+
+def compact(target, overlay, policy):
+	"""
+	# Copy the members of &overlay into &target and write the combined root members.
+	"""
+	aliases = {}
+	for name in overlay.namelist():
+		if name in overlay.combined:
+			# Constructed below; present in the view when there are no deltas.
+			continue
+
+		i, member = overlay.provider(name)
+		if member != name and overlay.provider(member) == (i, member):
+			# Alias of a member that remains visible.
+			aliases[name] = member
+			continue
+
+		members.transfer(overlay.layers[i], target, member, rename=name)
+
+	digests = {}
+	for i, layer in enumerate(overlay.layers):
+		try:
+			manifest = json.loads(layer.read('.digests.json'))
+		except KeyError:
+			continue
+
+		for outset, entry in manifest.items():
+			if overlay.owners.get(outset.split('/', 1)[0], 0) == i:
+				digests[outset] = entry
+
+	index = overlay.read('.index.json')
+	archive.store(target, policy, [
+		('.digests.json', json.dumps(digests, sort_keys=True).encode('utf-8')),
+		('.index.json', index),
+	])
+
+	rendering = overlay.rendering(overlay.layers[0])
+	if rendering is not None:
+		archive.store(target, policy, [
+			('.index.html', archive.r_index(rendering, 'r_project_index',
+				rendering['prefix'], rendering['partition'], json.loads(index))),
+		])
+
+	if aliases:
+		archive.store(target, policy, [
+			(members.aliases_name, json.dumps(aliases, sort_keys=True).encode('utf-8')),
+		])
+	members.finish(target, aliases)
+
+def main(inv:process.Invocation) -> process.Exit:
+	argv = inv.argv
+	compression = 'balanced'
+	remove = False
+	while argv and argv[0][:1] == '-':
+		if argv[0] == '-c':
+			compression = argv[1]
+			argv = argv[2:]
+		elif argv[0] == '-r':
+			remove = True
+			argv = argv[1:]
+		else:
+			raise ValueError("unknown option: " + argv[0])
+
+	outstr, base, *deltas = argv
+	policy = members.Policy(**members.policies[compression])
+
+	# Written beside the output and renamed; the suffix selects the format.
+	d, f = os.path.split(outstr)
+	tmp = os.path.join(d, '.compact-' + f)
+
+	with contextlib.ExitStack() as stack:
+		layers = [stack.enter_context(members.open(x)) for x in [base] + deltas]
+		overlay = members.Overlay(layers[0], layers[1:])
+		target = stack.enter_context(members.open(tmp, mode='w'))
+		compact(target, overlay, policy)
+
+	os.replace(tmp, outstr)
+	if remove:
+		for x in deltas:
+			os.unlink(x)
+
+	sys.stderr.writelines(policy.report())
+	return inv.exit(0)
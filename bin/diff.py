@@ -0,0 +1,88 @@
+"""
+# Construct a patch of the members that differ between two archives.
+
+# Members are compared by name, CRC, and size using the archives' member
+# descriptions; nothing is inflated. The patch is an archive holding the compressed
+# members of the new archive that are absent or different in the old one, and
+# a `.patch.json` member describing how &.apply reconstructs the new archive
+# from the old one.
+
+# [ Options ]
+# /`-c policy`/
+	# Select the compression policy used to store the patch description.
+"""
+import sys
+import json
+import hashlib
+import contextlib
+
+from fault.system import process
+
+from .. import store as members
+from . import archive
+
+# Member of a patch describing the changes.
+patch_name = '.patch.json'
+
+def entries(source):
+	"""
+	# Identify the CRC and size of the stored members of &source.
+	# Aliases and the member index are excluded.
+	"""
+	try:
+		aliases = json.loads(source.read(members.aliases_name))
+	except KeyError:
+		aliases = {}
+
+	r = {}
+	for name in source.namelist():
+		if name == members.index_name or name in aliases:
+			continue
+
+		info = source.getinfo(name)
+		r[name] = (info.CRC, info.file_size)
+
+	return r
+
+def signature(entries):
+	"""
+	# Construct the digest identifying the members described by &entries.
+	"""
+	return hashlib.sha256(json.dumps(sorted(entries.items())).encode('utf-8')).hexdigest()
+
+def diff(target, old, new, policy):
+	"""
+	# Write the patch transforming &old into &new into &target.
+	"""
+	o = entries(old)
+	n = entries(new)
+
+	changed = [x for x in n if o.get(x) != n[x]]
+	for name in changed:
+		members.transfer(new, target, name)
+
+	archive.store(target, policy, [(patch_name, json.dumps({
+		'base': signature(o),
+		'members': list(n),
+		'changed': changed,
+		'removed': sorted(set(o) - set(n)),
+	}).encode('utf-8'))])
+	members.finish(target)
+
+	return len(changed), len(n) - len(changed), len(set(o) - set(n))
+
+def main(inv:process.Invocation) -> process.Exit:
+	config, argv = archive.options(inv.argv)
+	patch, old, new = argv
+	policy = members.Policy(**members.policies[config['compression']])
+
+	with contextlib.ExitStack() as stack:
+		o = stack.enter_context(members.open(old))
+		n = stack.enter_context(members.open(new))
+		target = stack.enter_context(members.open(patch, mode='w'))
+		changed, unchanged, removed = diff(target, o, n, policy)
+
+	sys.stderr.write("[diff] %d members changed or added, %d unchanged, %d removed\n" %(
+		changed, unchanged, removed
+	))
+	return inv.exit(0)
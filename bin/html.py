@@ -1,5 +1,9 @@
 """
 # System command access to &.html rendering functionality.
+
+# When the first argument is `-j`, the following five arguments are those of &.bin.join
+# and the factor is rendered from its delineation image using &.join.structure
+# rather than from chapter text.
 """
 import sys
 import pprint
@@ -8,14 +12,32 @@ import traceback
 
 from fault.system import process
 from fault.system import files
+from fault.project import system as lsf
 from .. import html
+from .. import join
+
+def structure(ctxdir, project_name, project_factor, fragments, source):
+	"""
+	# Construct the element tree of the factor's chapter from its delineation image.
+	"""
+	ctx = lsf.Context()
+	pd = ctx.connect(files.Path.from_path(ctxdir))
+	req = ctx.from_product_connections(pd)
+	req.load()
+
+	res = join.Resolution(ctx, ctx, ctx.project(project_name), lsf.types.factor@project_factor)
+	return join.structure(res, files.Path.from_path(fragments), files.Path.from_path(source))
 
 def main(inv:process.Invocation) -> process.Exit:
-	src, *styles = inv.argv
-	sf = files.Path.from_path(src)
+	if inv.argv[:1] == ['-j']:
+		doctext = structure(*inv.argv[1:6])
+		styles = inv.argv[6:]
+	else:
+		src, *styles = inv.argv
+		sf = files.Path.from_path(src)
 
-	with sf.fs_open('r') as f:
-		doctext = f.read()
+		with sf.fs_open('r') as f:
+			doctext = f.read()
 
 	try:
 		sys.stdout.buffer.writelines(html.transform('', 0, doctext, styles=styles))
@@ -0,0 +1,348 @@
+"""
+# Measure the access costs of corpus archives.
+
+# For each archive given, reports the time taken to open it, the mean latency
+# of reading a sample of its members, and the growth of the maximum resident
+# set size. Each archive is measured in a separate process.
+
+# [ Options ]
+# /`-n count`/
+	# The number of members to read; defaults to `1024`.
+# /`-t`/
+	# Measure chapter loading instead: the time spent parsing the text of
+	# chapters that have a `.chapter.tree` member and loading the tree.
+# /`-d`/
+	# Measure documentation parsing instead: the arguments are the source directories
+	# of delineation images, and the time spent parsing their documentation strings
+	# separately is compared with parsing them in a batch.
+# /`-i`/
+	# Measure element indexes instead: the arguments are the source directories
+	# of delineation images, and the memory allocated by the &..join.index of their
+	# elements is compared with that of the &..join.CompactIndex.
+# /`-r product variant`/
+	# Measure the joining of factors instead: the arguments identify factors as
+	# `project/factor`, and the time spent joining their sources with a
+	# &..join.Resolution per source is compared with one shared by the factor.
+	# &variant is a `system/architecture` string as given to &.archive.
+	# Both are run once untimed and then timed in alternating order.
+# /`-l`/
+	# Measure reference lookups instead: the arguments are `depth:breadth:vocabulary`
+	# triples describing generated element trees, and the time spent by &..join.find
+	# and &..join.locate performing the same &count lookups is compared.
+	# The vocabulary is the number of distinct identifiers and defaults to one per element.
+"""
+import sys
+import time
+import random
+import resource
+import tracemalloc
+
+from fault.system import process
+from fault.system import files
+from fault.text import nodes
+from fault.project import system as lsf
+
+from .. import store
+from .. import tools
+from .. import join
+
+def measure(path, count):
+	"""
+	# Open the archive at &path and read &count of its members.
+
+	# [ Returns ]
+	# The seconds spent opening the archive, the mean seconds spent per read,
+	# and the increase of the maximum resident set size in kilobytes.
+	"""
+	rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+	start = time.perf_counter()
+	archive = store.open(path)
+	opened = time.perf_counter() - start
+
+	with archive:
+		names = archive.namelist()
+		sample = names[::max(1, len(names) // count)][:count]
+
+		start = time.perf_counter()
+		for x in sample:
+			archive.read(x)
+		elapsed = time.perf_counter() - start
+
+	growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss
+	return opened, elapsed / max(1, len(sample)), growth
+
+def chapters(path, count):
+	"""
+	# Parse and load &count of the chapters of the archive at &path having element trees.
+
+	# [ Returns ]
+	# The number of chapters measured, and the mean seconds spent parsing
+	# the chapter text and loading the element tree.
+	"""
+	parsing = 0.0
+	loading = 0.0
+
+	with store.open(path) as archive:
+		trees = [x for x in archive.namelist() if x.endswith('/.chapter.tree')]
+		sample = trees[::max(1, len(trees) // count)][:count]
+
+		for x in sample:
+			text = archive.read(x[:-len('.tree')] + '.txt').decode('utf-8')
+			data = archive.read(x)
+
+			start = time.perf_counter()
+			tools.parse(text)
+			parsing += time.perf_counter() - start
+
+			start = time.perf_counter()
+			tools.deserialize(data)
+			loading += time.perf_counter() - start
+
+	n = max(1, len(sample))
+	return len(sample), parsing / n, loading / n
+
+def documentation(path):
+	"""
+	# Parse the documentation strings of the delineation image source directory
+	# at &path separately and as a batch.
+
+	# [ Returns ]
+	# The number of strings, and the seconds spent parsing them separately and in a batch.
+	"""
+	d = files.Path.from_path(path)
+	with (d/'documented.json').fs_open('r') as f:
+		keys = join.load(f)
+	with (d/'documentation.json').fs_open('r') as f:
+		strings = join.load(f)
+	docs = dict(zip(map(tuple, keys), strings))
+
+	start = time.perf_counter()
+	for x in docs.values():
+		nodes.Cursor.from_chapter_text('\n'.join(x))
+	separately = time.perf_counter() - start
+
+	start = time.perf_counter()
+	join.parse_documentation(docs)
+	batched = time.perf_counter() - start
+
+	return len(docs), separately, batched
+
+def indexes(path):
+	"""
+	# Construct the element indexes of the delineation image source directory at &path.
+
+	# [ Returns ]
+	# The number of indexed elements, and the bytes allocated by the &join.index
+	# and by the &join.CompactIndex.
+	"""
+	d = files.Path.from_path(path)
+	with (d/'elements.json').fs_open('r') as f:
+		elements = join.load(f)
+
+	tracemalloc.start()
+	try:
+		idx = join.index(elements)
+		mapping = tracemalloc.get_traced_memory()[0]
+		n = len(idx)
+		del idx
+
+		base = tracemalloc.get_traced_memory()[0]
+		idx = join.CompactIndex(elements)
+		idx.seal()
+		compact = tracemalloc.get_traced_memory()[0] - base
+		del idx
+	finally:
+		tracemalloc.stop()
+
+	return n, mapping, compact
+
+def resolution(build, projects, identifier, rounds=4):
+	"""
+	# Join the sources of the factor &identifier with a &join.Resolution
+	# per source and with one shared by all of them.
+
+	# After an untimed run of both, each is timed &rounds times
+	# alternating which runs first.
+
+	# [ Returns ]
+	# The number of sources joined, and the least seconds spent joining them
+	# separately and with the shared instance.
+	"""
+	project, factor = identifier.split('/', 1)
+	pj = projects[project]
+
+	for ((path, type), (reqs, sources)) in pj.select(lsf.types.factor):
+		if str(path) == factor:
+			break
+	else:
+		raise LookupError("factor not present in project: " + factor)
+
+	img = build.images.image(build.variants, pj, path)
+	if img is None:
+		return 0, 0.0, 0.0
+
+	selected = []
+	for x in (x[1] for x in sources):
+		srcdir = img + x.points
+		if build.images.isdirectory(str(srcdir)):
+			selected.append((srcdir, x))
+
+	def separate():
+		for srcdir, x in selected:
+			rr = join.Resolution(build.req, build.ctx, pj, path)
+			for l in join.transform(rr, srcdir, x, stream=True, batch=True):
+				pass
+
+	def share():
+		rr = join.Resolution(build.req, build.ctx, pj, path)
+		for srcdir, x in selected:
+			for l in join.transform(rr, srcdir, x, stream=True, batch=True):
+				pass
+
+	# Untimed run so that neither pays for the page cache and the symbol tables.
+	separate()
+	share()
+
+	# Alternate the order of the runs and keep the fastest of each.
+	times = {separate: [], share: []}
+	for i in range(rounds):
+		for f in ((separate, share) if i % 2 == 0 else (share, separate)):
+			start = time.perf_counter()
+			f()
+			times[f].append(time.perf_counter() - start)
+
+	separately = min(times[separate])
+	shared = min(times[share])
+
+	return len(selected), separately, shared
+
+def generate(depth, breadth, vocabulary, rng):
+	"""
+	# Construct an element tree of &depth levels where each element has &breadth
+	# subnodes whose identifiers are selected from &vocabulary identifiers.
+	"""
+	if depth == 0:
+		return []
+
+	return [
+		('class', generate(depth - 1, breadth, vocabulary, rng), {'identifier': 'i%d' %(rng.randrange(vocabulary),)})
+		for i in range(breadth)
+	]
+
+def lookups(spec, count):
+	"""
+	# Perform &count lookups of relative references with &join.find and &join.locate
+	# in the index of an element tree generated using the `depth:breadth:vocabulary` &spec.
+
+	# [ Returns ]
+	# The number of indexed elements, and the seconds spent by &join.find and &join.locate.
+	"""
+	depth, breadth, *vocabulary = map(int, spec.split(':'))
+	vocabulary = vocabulary[0] if vocabulary else breadth ** depth
+	rng = random.Random(0)
+	root = ('module', generate(depth, breadth, vocabulary, rng), {})
+	idx = join.index(root)
+
+	paths = [k for k in idx if len(k) == depth]
+	queries = []
+	for i in range(count):
+		path = rng.choice(paths)
+		target = rng.choice(paths)
+		k = rng.randrange(depth)
+		queries.append((path, target[k:k+2]))
+
+	# Untimed run of both.
+	for path, rpath in queries:
+		join.find(idx, path, rpath)
+		join.locate(idx, path, rpath)
+
+	start = time.perf_counter()
+	for path, rpath in queries:
+		join.find(idx, path, rpath)
+	found = time.perf_counter() - start
+
+	start = time.perf_counter()
+	for path, rpath in queries:
+		join.locate(idx, path, rpath)
+	located = time.perf_counter() - start
+
+	return len(idx), found, located
+
+def main(inv:process.Invocation) -> process.Exit:
+	from concurrent.futures import ProcessPoolExecutor
+
+	argv = inv.argv
+	count = 1024
+	trees = False
+	docs = False
+	build = None
+	sizes = False
+	references = False
+	while argv[:1] in (['-n'], ['-t'], ['-d'], ['-i'], ['-r'], ['-l']):
+		if argv[0] == '-n':
+			count = int(argv[1])
+			argv = argv[2:]
+		elif argv[0] == '-r':
+			from . import archive
+			config, rest = archive.options([])
+			build = archive.Build(config, argv[1], [argv[2]])
+			projects = {str(pj.factor): pj for pj in build.ctx.iterprojects()}
+			argv = argv[3:]
+		elif argv[0] == '-t':
+			trees = True
+			argv = argv[1:]
+		elif argv[0] == '-i':
+			sizes = True
+			argv = argv[1:]
+		elif argv[0] == '-l':
+			references = True
+			argv = argv[1:]
+		else:
+			docs = True
+			argv = argv[1:]
+
+	for path in argv:
+		if build is not None:
+			n, separately, shared = resolution(build, projects, path)
+			sys.stdout.write("%s: %d sources, separately %.6fs, shared %.6fs\n" %(
+				path, n, separately, shared
+			))
+			continue
+
+		if references:
+			n, found, located = lookups(path, count)
+			sys.stdout.write("%s: %d elements, find %.6fs, locate %.6fs\n" %(
+				path, n, found, located
+			))
+			continue
+
+		if sizes:
+			n, mapping, compact = indexes(path)
+			sys.stdout.write("%s: %d elements, index %d bytes, compact %d bytes\n" %(
+				path, n, mapping, compact
+			))
+			continue
+
+		if docs:
+			n, separately, batched = documentation(path)
+			sys.stdout.write("%s: %d strings, separately %.6fs, batched %.6fs\n" %(
+				path, n, separately, batched
+			))
+			continue
+
+		if trees:
+			n, parsing, loading = chapters(path, count)
+			sys.stdout.write("%s: %d chapters, parse %.6fs, load %.6fs, %.6fs saved per page\n" %(
+				path, n, parsing, loading, parsing - loading
+			))
+			continue
+
+		with ProcessPoolExecutor(1) as pool:
+			opened, latency, growth = pool.submit(measure, path, count).result()
+
+		sys.stdout.write("%s: open %.6fs, read %.6fs per member, %d KiB resident\n" %(
+			path, opened, latency, growth
+		))
+
+	return inv.exit(0)
@@ -0,0 +1,109 @@
+"""
+# Combine the partial archives built by &.archive shards into a corpus archive.
+
+# Members are copied without recompression. The root `.index.json` entries and
+# the `.digests.json` manifests of the shards are concatenated in the order that
+# the shards are given, and the root `.index.html` of pre-rendered shards is
+# rendered from the combined index.
+
+# [ Options ]
+# /`-c policy`/
+	# Select the compression policy used to store the combined members.
+"""
+import sys
+import json
+import contextlib
+
+from fault.system import process
+
+from .. import store as members
+from . import archive
+
+# Root members constructed from the combination of the shards.
+combined = {
+	'.index.json',
+	'.index.html',
+	'.digests.json',
+	'.html.json',
+	members.index_name,
+	members.aliases_name,
+}
+
+def merge(target, shards, policy):
+	"""
+	# Copy the members of the &shards into &target and write the combined root members.
+	"""
+	index = []
+	digests = {}
+	renderings = []
+	aliases = {}
+	names = set()
+
+	for shard in shards:
+		try:
+			saliases = json.loads(shard.read(members.aliases_name))
+		except KeyError:
+			saliases = {}
+
+		for name in shard.namelist():
+			if name in combined or name in saliases:
+				continue
+			if name in names:
+				raise ValueError("member present in multiple shards: " + name)
+
+			members.transfer(shard, target, name)
+			names.add(name)
+
+		# Deduplicated within the shard; continue to refer to the stored member.
+		for name, canonical in saliases.items():
+			if name in names:
+				raise ValueError("member present in multiple shards: " + name)
+			aliases[name] = canonical
+			names.add(name)
+
+		index.extend(json.loads(shard.read('.index.json')))
+
+		try:
+			digests.update(json.loads(shard.read('.digests.json')))
+		except KeyError:
+			pass
+
+		try:
+			renderings.append(json.loads(shard.read('.html.json')))
+		except KeyError:
+			renderings.append(None)
+
+	rendering = renderings[0] if renderings else None
+	if any(x != rendering for x in renderings):
+		raise ValueError("shards were not rendered with the same parameters")
+
+	archive.store(target, policy, [
+		('.digests.json', json.dumps(digests, sort_keys=True).encode('utf-8')),
+		('.index.json', json.dumps(index, ensure_ascii=False).encode('utf-8')),
+	])
+
+	if rendering is not None:
+		archive.store(target, policy, [
+			('.index.html', archive.r_index(rendering, 'r_project_index',
+				rendering['prefix'], rendering['partition'], index)),
+			('.html.json', json.dumps(rendering).encode('utf-8')),
+		])
+
+	if aliases:
+		archive.store(target, policy, [
+			(members.aliases_name, json.dumps(aliases, sort_keys=True).encode('utf-8')),
+		])
+	members.finish(target, aliases)
+
+def main(inv:process.Invocation) -> process.Exit:
+	config, argv = archive.options(inv.argv)
+	outstr, *shard_s = argv
+	policy = members.Policy(**members.policies[config['compression']])
+
+	with contextlib.ExitStack() as stack:
+		shards = [stack.enter_context(members.open(x)) for x in shard_s]
+		target = stack.enter_context(members.open(outstr, mode='w'))
+		merge(target, shards, policy)
+
+	sys.stderr.writelines(policy.report())
+	return inv.exit(0)
@@ -0,0 +1,209 @@
+"""
+# Persistent cache of parsed documentation trees.
+
+# Documentation strings rarely change between builds, so the element trees parsed
+# from them by &.join.Text are stored in a SQLite database keyed by the digest of
+# the text. The database is shared by concurrent processes and limited to a
+# configured size by evicting the least recently used trees.
+"""
+import time
+import hashlib
+import sqlite3
+
+from fault.text import nodes
+
+from . import tools
+
+class Trees(object):
+	"""
+	# SQLite database of serialized element trees keyed by the digest of their text.
+
+	# Trees are committed as they are stored so that concurrent processes
+	# never wait on another's write for longer than a single statement.
+	# Usage and counters are accumulated in memory and written by &flush,
+	# which also performs any necessary eviction. A database that cannot be
+	# accessed, such as one locked for too long, is treated as a cache miss.
+
+	# [ Properties ]
+	# /capacity/
+		# The maximum number of bytes of serialized trees held by the database.
+	# /counts/
+		# The `hits`, `misses`, `stores`, and `evictions` not yet written by &flush.
+	"""
+
+	schema = (
+		"CREATE TABLE IF NOT EXISTS trees ("
+			"digest BLOB PRIMARY KEY, "
+			"size INTEGER NOT NULL, "
+			"used REAL NOT NULL, "
+			"data BLOB NOT NULL"
+		") WITHOUT ROWID",
+		"CREATE INDEX IF NOT EXISTS trees_used ON trees (used)",
+		"CREATE TABLE IF NOT EXISTS statistics ("
+			"key TEXT PRIMARY KEY, "
+			"value INTEGER NOT NULL"
+		") WITHOUT ROWID",
+	)
+
+	counters = ('hits', 'misses', 'stores', 'evictions')
+
+	def __init__(self, path, capacity=1024*1024*256):
+		self.path = str(path)
+		self.capacity = capacity
+		self.counts = dict.fromkeys(self.counters, 0)
+		self.used = set()
+
+		# Autocommit; &flush manages its own transaction.
+		self.db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+		self.db.execute("PRAGMA journal_mode = WAL")
+		self.db.execute("PRAGMA synchronous = NORMAL")
+		for x in self.schema:
+			self.db.execute(x)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def close(self):
+		if self.db is None:
+			return
+
+		self.flush()
+		self.db.close()
+		self.db = None
+
+	@staticmethod
+	def digest(text:str) -> bytes:
+		return hashlib.sha256(text.encode('utf-8')).digest()
+
+	def load(self, text:str):
+		"""
+		# Retrieve the tree parsed from &text.
+
+		# [ Returns ]
+		# The element tree or &None if it has not been stored.
+		"""
+		key = self.digest(text)
+		try:
+			r = self.db.execute("SELECT data FROM trees WHERE digest = ?", (key,)).fetchone()
+		except sqlite3.OperationalError:
+			r = None
+
+		if r is None:
+			self.counts['misses'] += 1
+			return None
+
+		try:
+			tree = tools.deserialize(r[0])
+		except ValueError:
+			# Unsupported or foreign entry; replaced when the tree is stored.
+			self.counts['misses'] += 1
+			return None
+
+		self.counts['hits'] += 1
+		self.used.add(key)
+		return tree
+
+	def store(self, text:str, tree):
+		"""
+		# Record the &tree parsed from &text.
+		"""
+		data = tools.serialize(tree)
+		try:
+			self.db.execute(
+				"INSERT OR REPLACE INTO trees VALUES (?, ?, ?, ?)",
+				(self.digest(text), len(data), time.time(), data)
+			)
+		except sqlite3.OperationalError:
+			return
+		self.counts['stores'] += 1
+
+	def cursor(self, text:str) -> nodes.Cursor:
+		"""
+		# Construct the cursor of the chapter &text using the stored tree if any.
+		"""
+		tree = self.load(text)
+		if tree is None:
+			c = nodes.Cursor.from_chapter_text(text)
+			self.store(text, c.root[0])
+			return c
+
+		return nodes.Cursor.from_chapter_content(tree)
+
+	def evict(self):
+		"""
+		# Remove the least recently used trees until the database is within &capacity.
+		"""
+		total, = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM trees").fetchone()
+		excess = total - self.capacity
+		if excess <= 0:
+			return
+
+		removed = []
+		for key, size in self.db.execute("SELECT digest, size FROM trees ORDER BY used"):
+			removed.append((key,))
+			excess -= size
+			if excess <= 0:
+				break
+
+		self.db.executemany("DELETE FROM trees WHERE digest = ?", removed)
+		self.counts['evictions'] += len(removed)
+
+	def flush(self):
+		"""
+		# Write the usage of the trees loaded since the last flush and the counters,
+		# and evict trees if the database exceeds its &capacity.
+
+		# If the database cannot be written, the usage and counters are
+		# retained for the next flush.
+		"""
+		now = time.time()
+		counts = dict(self.counts)
+		try:
+			self.db.execute("BEGIN IMMEDIATE")
+			try:
+				self.db.executemany("UPDATE trees SET used = ? WHERE digest = ?", (
+					(now, key) for key in self.used
+				))
+				self.evict()
+				self.db.executemany(
+					"INSERT INTO statistics VALUES (?, ?) "
+					"ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+					self.counts.items()
+				)
+				self.db.execute("COMMIT")
+			except:
+				self.db.execute("ROLLBACK")
+				raise
+		except sqlite3.OperationalError:
+			self.counts = counts
+			return
+
+		self.used.clear()
+		self.counts = dict.fromkeys(self.counters, 0)
+
+	def statistics(self):
+		"""
+		# Retrieve the accumulated counters of all the processes using the database
+		# along with the number of `entries` and their `size`.
+		"""
+		stats = dict.fromkeys(self.counters, 0)
+		stats.update(self.db.execute("SELECT key, value FROM statistics"))
+		for k, v in self.counts.items():
+			stats[k] += v
+
+		stats['entries'], stats['size'] = self.db.execute(
+			"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM trees"
+		).fetchone()
+		return stats
+
+	def report(self):
+		"""
+		# Produce the line summarizing the &statistics.
+		"""
+		s = self.statistics()
+		yield "[archive] documentation cache: %d hits, %d misses, %d stored, %d evicted, %d trees in %d bytes\n" %(
+			s['hits'], s['misses'], s['stores'], s['evictions'], s['entries'], s['size']
+		)
@@ -1,8 +1,11 @@
 """
 # Web application for serving a project corpus.
 """
+import os
+import time
 import json
-import zipfile
+import traceback
+import contextlib
 import collections
 import itertools
 from dataclasses import dataclass
@@ -12,8 +15,10 @@ from fault.web import service, system
 from fault.web import xml
 
 from . import html
+from . import store
+from . import tools
 
-def render_factor_html(prefix, depth, styles, type, identifier, chapter:str, Transform=html.transform):
+def render_factor_html(prefix, depth, styles, type, identifier, chapter, Transform=html.transform):
 	return Transform(prefix, depth, chapter, styles=styles, identifier=identifier, type=type)
 
 def buffer(iterator, limit=1024*4):
@@ -117,6 +122,16 @@ class Select(object):
 
 		return (rsrc, type)
 
+	def renderedpath(self, meta):
+		"""
+		# Calculate the archive path of the pre-rendered HTML of the selected chapter.
+		"""
+		path, type = self.archivepath(*meta)
+		if type == 'source':
+			return path + '/.chapter.html'
+		else:
+			return path + '/.factor.html'
+
 	def readmeta(self, corpus):
 		"""
 		# Retrieve the .meta.json entry for the factor being referenced.
@@ -127,8 +142,16 @@ class Select(object):
 	def readchapter(self, corpus, meta):
 		"""
 		# Retrieve the chapter for the given identifier.
+
+		# The element tree is used when the archive has it, and the chapter text otherwise.
 		"""
 		path, type = self.archivepath(*meta)
+		try:
+			return tools.deserialize(corpus.cp_read(path + '/.chapter.tree'))
+		except (KeyError, ValueError):
+			# Absent or of an unsupported format.
+			pass
+
 		rsrc = '/.chapter.txt'
 		return corpus.cp_read(path + rsrc).decode('utf-8')
 
@@ -158,6 +181,28 @@ media_types = {
 	'png': b'image/png',
 }
 
+# Extensions of the members that are served with their stored deflate data
+# when the client accepts gzip content encoding.
+encoded_types = {'json', 'txt', 'html'}
+
+def accepts_gzip(request) -> bool:
+	"""
+	# Whether the `Accept-Encoding` header of the &request permits gzip.
+	"""
+	for k, v in request.headers:
+		if k.lower() != b'accept-encoding':
+			continue
+
+		for coding in v.split(b','):
+			name, *params = coding.strip().split(b';')
+			if name.strip().lower() not in {b'gzip', b'*'}:
+				continue
+			if any(x.strip().replace(b' ', b'') in {b'q=0', b'q=0.0', b'q=0.00', b'q=0.000'} for x in params):
+				continue
+			return True
+
+	return False
+
 def r_icon(sx, icons):
 	jsstr = icons.get('emoji', '🚧')
 	return sx.escape(jsstr)
@@ -276,11 +321,111 @@ def r_sources(sx, index, icon=(b"\xf0\x9f\x93\x84".decode('utf-8'))):
 		('class', 'source-index'),
 	)
 
+def r_head(sx, styles):
+	return sx.element('head',
+		itertools.chain(
+			sx.element('meta', None, ('charset', 'utf-8')),
+			itertools.chain.from_iterable(
+				sx.element('link', (), ('as', 'style'), rel='preload', href=x)
+				for x in styles
+			),
+			itertools.chain.from_iterable(
+				sx.element('link', (), rel='stylesheet', href=x)
+				for x in styles
+			),
+		)
+	)
+
+def r_project_index(sx, styles, prefix, partition, idx):
+	"""
+	# Render the project index page listing the projects in &idx.
+	"""
+	return sx.element('html',
+		itertools.chain(
+			r_head(sx, styles),
+			sx.element('body',
+				sx.element('main',
+					itertools.chain(
+						sx.element('h1', sx.escape("Project Index")),
+						r_projects(prefix, sx, partition, idx),
+						sx.element('h1', sx.escape(''), ('class', 'footer')),
+					)
+				),
+				('class', 'index'),
+			),
+		)
+	)
+
+def r_factor_index(sx, styles, partition, project, idx):
+	"""
+	# Render the factor index page of &project listing the factors in &idx.
+	"""
+	return sx.element('html',
+		itertools.chain(
+			r_head(sx, styles),
+			sx.element('body',
+				sx.element('main',
+					itertools.chain(
+						sx.element('h1',
+							itertools.chain(
+								sx.element('span', sx.escape(project)),
+								sx.element('span',
+									sx.escape("factor-index"),
+									('class', 'abstract-type')
+								)
+							)
+						),
+						r_factors(sx, partition, idx),
+						sx.element('h1', sx.escape(''), ('class', 'footer')),
+					)
+				),
+				('class', 'index'),
+			),
+		)
+	)
+
+def r_source_index(sx, styles, fpath, idx):
+	"""
+	# Render the source index page of the factor &fpath listing the sources in &idx.
+	"""
+	return sx.element('html',
+		itertools.chain(
+			r_head(sx, styles),
+			sx.element('body',
+				sx.element('main',
+					itertools.chain(
+						sx.element('h1',
+							itertools.chain(
+								sx.element('span', sx.escape(fpath)),
+								sx.element('span',
+									sx.escape("source-tree"),
+									('class', 'abstract-type')
+								)
+							)
+						),
+						r_sources(sx, idx),
+						sx.element('h1', sx.escape(''), ('class', 'footer')),
+					)
+				),
+				('class', 'index'),
+			),
+		)
+	)
+
 class Corpus(service.Partition):
 	"""
 	# Corpus application providing access to a set of projects and their factors.
+
+	# The first route is the corpus archive. The optional second route is a directory
+	# of delta archives, `.zip` or `.pack` files holding rebuilt projects, that are
+	# applied in name order as a &store.Overlay. Deltas added to the directory are
+	# applied without reopening the corpus; removing any causes a full reload.
+	# Deltas must be moved into the directory once complete.
 	"""
-	Archive = zipfile.ZipFile
+	Archive = staticmethod(store.open)
+
+	# Seconds between checks of the delta directory.
+	cp_refresh_interval = 1.0
 
 	@staticmethod
 	def cp_parse_arguments(argv):
@@ -303,12 +448,100 @@ class Corpus(service.Partition):
 	def cp_update(self, route):
 		if self.cp_archive is not None:
 			self.cp_archive.close()
+			self.cp_archive = None
+
+		# Every archive opened is closed if the view cannot be constructed.
+		with contextlib.ExitStack() as stack:
+			archive = stack.enter_context(self.Archive(str(route)))
+			self.cp_delta_paths = self.cp_deltas()
+			if self.cp_delta_paths:
+				deltas = [stack.enter_context(self.Archive(x)) for x in self.cp_delta_paths]
+				archive = store.Overlay(archive, deltas)
+			stack.pop_all()
 
-		self.cp_archive = self.Archive(str(route))
-		self.cp_projects = set(x[0] for x in self.cp_read_json('.index.json'))
+		self.cp_install(archive)
+
+	def cp_install(self, archive):
+		"""
+		# Serve the corpus in &archive.
+		"""
+		try:
+			aliases = json.loads(archive.read(store.aliases_name))
+		except KeyError:
+			aliases = {}
+		projects = set(x[0] for x in json.loads(archive.read('.index.json')))
+
+		# Pre-rendered HTML is only usable when rendered with the same parameters.
+		try:
+			rendering = json.loads(archive.read('.html.json'))
+		except KeyError:
+			rendered = False
+		else:
+			rendered = (rendering == self.cp_rendering())
+
+		# Swapped together so that requests never observe a partial update.
+		self.cp_archive, self.cp_aliases, self.cp_projects, self.cp_rendered = (
+			archive, aliases, projects, rendered
+		)
+
+	def cp_deltas(self):
+		"""
+		# The paths of the delta archives in the delta directory in the order of application.
+		"""
+		if len(self.routes) < 2:
+			return []
+
+		d = str(self.routes[1])
+		try:
+			names = sorted(os.listdir(d))
+		except FileNotFoundError:
+			return []
+
+		return [os.path.join(d, x) for x in names if x.endswith(('.zip', store.pack_suffix))]
+
+	def cp_apply(self, route):
+		"""
+		# Apply the delta archive at &route to the served corpus without reopening it.
+		"""
+		delta = self.Archive(str(route))
+		try:
+			if isinstance(self.cp_archive, store.Overlay):
+				archive = self.cp_archive.apply(delta)
+			else:
+				archive = store.Overlay(self.cp_archive, [delta])
+		except:
+			delta.close()
+			raise
+
+		self.cp_install(archive)
+		self.cp_delta_paths.append(str(route))
+
+	def cp_refresh(self):
+		"""
+		# Apply the deltas added to the delta directory, or reload
+		# the corpus if any of the applied deltas were removed.
+		"""
+		now = time.monotonic()
+		if now - self.cp_checked < self.cp_refresh_interval:
+			return
+		self.cp_checked = now
+
+		current = self.cp_deltas()
+		applied = self.cp_delta_paths
+		try:
+			if current[:len(applied)] != applied:
+				# Removed or reordered; presumably compacted into the corpus archive.
+				self.cp_update(self.routes[0])
+			else:
+				for x in current[len(applied):]:
+					self.cp_apply(x)
+		except Exception:
+			# Continue serving the current view; retried at the next interval.
+			traceback.print_exc()
 
 	def part_dispatched(self, argv):
 		self.cp_archive = None
+		self.cp_checked = time.monotonic()
 		self.cp_context, self.routes, self.cp_parameters = self.cp_parse_arguments(argv)
 		if self.cp_context:
 			self.cp_prefix = self.cp_context + '.'
@@ -333,6 +566,17 @@ class Corpus(service.Partition):
 		self.cp_update(self.routes[0])
 		self.cp_available = True
 
+	def cp_rendering(self):
+		"""
+		# The parameters used by the partition to render HTML.
+		# Compared against the `.html.json` member to validate pre-rendered HTML.
+		"""
+		return {
+			'prefix': self.cp_prefix,
+			'partition': self.part_path,
+			'styles': self._cp_styles_prefixed,
+		}
+
 	def cp_read_json(self, path):
 		return json.loads(self.cp_read(path))
 
@@ -340,6 +584,8 @@ class Corpus(service.Partition):
 		"""
 		# Read a resource from the configured archive.
 		"""
+		self.cp_refresh()
+		path = self.cp_aliases.get(path, path)
 		try:
 			out = self.cp_archive.read(path)
 		except KeyError:
@@ -359,59 +605,91 @@ class Corpus(service.Partition):
 
 		return out
 
-	def cp_send_resource(self, ctl, path):
-		data = self.cp_archive.read(path)
+	def cp_send_encoded(self, ctl, path, cotype):
+		"""
+		# Send the stored deflate data of the member at &path as a gzip encoded response.
 
+		# [ Returns ]
+		# Whether the response was sent; &False when the member is not deflated.
+		"""
+		info, data = store.raw(self.cp_archive, self.cp_aliases.get(path, path))
+		parts = store.gzip(info, data)
+		if parts is None:
+			return False
+
+		size = sum(map(len, parts))
+		ctl.http_set_response(b'200', b'OK', size, cotype=cotype, headers=[
+			(b'Content-Encoding', b'gzip'),
+			(b'Vary', b'Accept-Encoding'),
+		])
+		ctl.http_iterate_output([parts])
+		return True
+
+	def cp_send_member(self, ctl, path, ext):
+		"""
+		# Send the archive member at &path as a resource of the type identified by &ext.
+		"""
+		cotype = media_types[ext]
+
+		if ext in encoded_types and accepts_gzip(ctl.request):
+			try:
+				if self.cp_send_encoded(ctl, path, cotype):
+					return
+			except KeyError:
+				raise
+			except Exception:
+				# Fallback to the inflated form.
+				pass
+
+		data = self.cp_read(path)
+		ctl.http_set_response(b'200', b'OK', len(data), cotype=cotype)
+		ctl.http_iterate_output([(data,)])
+
+	def cp_send_resource(self, ctl, path):
 		dot = path.rfind('.')
 		if dot == -1:
 			# Unknown type really.
 			raise KeyError("no such resource")
 
 		ext = path[dot+1:]
-		ctl.http_set_response(b'200', b'OK', len(data), cotype=media_types[ext])
-		ctl.http_iterate_output([(data,)])
+		self.cp_send_member(ctl, path, ext)
 
 	def cp_send_html(self, ctl, depth, chapter, factorpath, factortype):
 		html = render_factor_html(self.cp_prefix, depth, self._cp_styles_prefixed, factortype, factorpath, chapter)
 		ctl.http_set_response(b'200', b'OK', None, cotype=b'text/html')
 		ctl.http_iterate_output((x,) for x in buffer(html))
 
+	def cp_send_rendered(self, ctl, path):
+		"""
+		# Send the pre-rendered HTML stored at &path if the archive's
+		# rendering parameters match the partition's.
+
+		# [ Returns ]
+		# Whether the response was sent.
+		"""
+		if not self.cp_rendered:
+			return False
+
+		try:
+			self.cp_send_member(ctl, path, 'html')
+		except KeyError:
+			return False
+
+		return True
+
 	def cp_project_index(self, ctl, prefix=''):
 		"""
 		# Handle root HTML requests.
 		"""
+		if not prefix and self.cp_send_rendered(ctl, '.index.html'):
+			return
+
 		idx = [
 			x for x in self.cp_read_json('.index.json')
 			if x[0].startswith(prefix)
 		]
 		sx = xml.Serialization(xml_encoding='utf-8')
-		doc = sx.element('html',
-			itertools.chain(
-				sx.element('head',
-					itertools.chain(
-						sx.element('meta', None, ('charset', 'utf-8')),
-						itertools.chain.from_iterable(
-							sx.element('link', (), ('as', 'style'), rel='preload', href=x)
-							for x in self._cp_styles_prefixed
-						),
-						itertools.chain.from_iterable(
-							sx.element('link', (), rel='stylesheet', href=x)
-							for x in self._cp_styles_prefixed
-						),
-					)
-				),
-				sx.element('body',
-					sx.element('main',
-						itertools.chain(
-							sx.element('h1', sx.escape("Project Index")),
-							r_projects(self.cp_prefix, sx, self.part_path, idx),
-							sx.element('h1', sx.escape(''), ('class', 'footer')),
-						)
-					),
-					('class', 'index'),
-				),
-			)
-		)
+		doc = r_project_index(sx, self._cp_styles_prefixed, self.cp_prefix, self.part_path, idx)
 
 		ctl.http_set_response(b'200', b'OK', None, cotype=b'text/html')
 		ctl.http_iterate_output((x,) for x in buffer(doc))
@@ -420,46 +698,15 @@ class Corpus(service.Partition):
 		"""
 		# Handle root HTML requests.
 		"""
+		if not prefix and self.cp_send_rendered(ctl, project + '/.index.html'):
+			return
+
 		idx = [
 			x for x in self.cp_read_json(project + '/.index.json')
 			if x[0].startswith(prefix)
 		]
 		sx = xml.Serialization(xml_encoding='utf-8')
-		doc = sx.element('html',
-			itertools.chain(
-				sx.element('head',
-					itertools.chain(
-						sx.element('meta', None, ('charset', 'utf-8')),
-						itertools.chain.from_iterable(
-							sx.element('link', (), ('as', 'style'), rel='preload', href=x)
-							for x in self._cp_styles_prefixed
-						),
-						itertools.chain.from_iterable(
-							sx.element('link', (), rel='stylesheet', href=x)
-							for x in self._cp_styles_prefixed
-						),
-					)
-				),
-				sx.element('body',
-					sx.element('main',
-						itertools.chain(
-							sx.element('h1',
-								itertools.chain(
-									sx.element('span', sx.escape(project)),
-									sx.element('span',
-										sx.escape("factor-index"),
-										('class', 'abstract-type')
-									)
-								)
-							),
-							r_factors(sx, self.part_path, idx),
-							sx.element('h1', sx.escape(''), ('class', 'footer')),
-						)
-					),
-					('class', 'index'),
-				),
-			)
-		)
+		doc = r_factor_index(sx, self._cp_styles_prefixed, self.part_path, project, idx)
 
 		ctl.http_set_response(b'200', b'OK', None, cotype=b'text/html')
 		ctl.http_iterate_output((x,) for x in buffer(doc))
@@ -468,6 +715,9 @@ class Corpus(service.Partition):
 		"""
 		# Handle root HTML requests.
 		"""
+		if not prefix and self.cp_send_rendered(ctl, '/'.join((project, factor, '.sources.html'))):
+			return
+
 		fpath = '.'.join((project, factor))
 		idx = [
 			x for x in self.cp_read_json('/'.join((project, factor)) + '/.index.json')
@@ -475,41 +725,7 @@ class Corpus(service.Partition):
 		]
 
 		sx = xml.Serialization(xml_encoding='utf-8')
-		doc = sx.element('html',
-			itertools.chain(
-				sx.element('head',
-					itertools.chain(
-						sx.element('meta', None, ('charset', 'utf-8')),
-						itertools.chain.from_iterable(
-							sx.element('link', (), ('as', 'style'), rel='preload', href=x)
-							for x in self._cp_styles_prefixed
-						),
-						itertools.chain.from_iterable(
-							sx.element('link', (), rel='stylesheet', href=x)
-							for x in self._cp_styles_prefixed
-						),
-					)
-				),
-				sx.element('body',
-					sx.element('main',
-						itertools.chain(
-							sx.element('h1',
-								itertools.chain(
-									sx.element('span', sx.escape(fpath)),
-									sx.element('span',
-										sx.escape("source-tree"),
-										('class', 'abstract-type')
-									)
-								)
-							),
-							r_sources(sx, idx),
-							sx.element('h1', sx.escape(''), ('class', 'footer')),
-						)
-					),
-					('class', 'index'),
-				),
-			)
-		)
+		doc = r_source_index(sx, self._cp_styles_prefixed, fpath, idx)
 
 		ctl.http_set_response(b'200', b'OK', None, cotype=b'text/html')
 		ctl.http_iterate_output((x,) for x in buffer(doc))
@@ -555,6 +771,9 @@ class Corpus(service.Partition):
 
 			try:
 				meta = s.readmeta(self)
+				if self.cp_send_rendered(ctl, s.renderedpath(meta)):
+					return
+
 				if s.source:
 					chapter = s.readchapter(self, meta)
 				else:
@@ -5,9 +5,10 @@ from fault.context import tools
 from fault.context import comethod
 
 from fault.text import nodes
+from fault.text.types import Paragraph
 from fault.web import xml
 
-from .tools import get_properties, interpret_property_fragment, interpret_properties
+from .tools import get_properties, interpret_property_fragment, interpret_properties, cursor
 
 def formlink(reference:str) -> (str, str):
 	"""
@@ -683,7 +684,10 @@ class Render(comethod.object):
 		)
 
 	def paragraph_content(self, resolver, content, attr):
-		yield from self.paragraph(resolver, nodes.document.export(content), attr)
+		# Trees constructed by &.join.Structure hold exported paragraphs.
+		if not isinstance(content, Paragraph):
+			content = nodes.document.export(content)
+		yield from self.paragraph(resolver, content, attr)
 
 	def paragraph(self, resolver, para, attr):
 		for pt in para:
@@ -728,7 +732,10 @@ class Render(comethod.object):
 			yield from self.semantic_section(resolver, snode[1], snode[-1], tag='article')
 
 def transform(prefix, depth, chapter, styles=[], identifier='', type=''):
-	c = nodes.Cursor.from_chapter_text(chapter)
+	"""
+	# Render the &chapter text, or its element tree produced by &.tools.parse, as HTML.
+	"""
+	c = cursor(chapter)
 	sx = xml.Serialization(xml_encoding='utf-8')
 	r, = c.root
 	idx, ctx = prepare(r)
@@ -1,10 +1,17 @@
 """
 # Join delineated source data into a text file for subsequent rendering.
 """
+import os
+import re
 import json
 import sys
+import mmap
+import array
+import bisect
 import typing
+import weakref
 import collections
+import collections.abc
 
 from fault.context import comethod
 from fault.context import tools
@@ -41,6 +48,49 @@ def itruncate(lines:[str], indentation='\t', ilevel=string.ilevel):
 		for il, line in clines
 	]
 
+class Lines(collections.abc.Sequence):
+	"""
+	# The lines of a source file read from a memory map of the file.
+
+	# The offsets of the lines are found once, and lines are decoded
+	# only when they are accessed.
+	"""
+
+	def __init__(self, path, encoding='utf-8', newline=re.compile(b'\n')):
+		self.encoding = encoding
+
+		with open(path, 'rb') as f:
+			if os.fstat(f.fileno()).st_size:
+				self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+			else:
+				self.map = b''
+
+		self.offsets = array.array('Q', [0])
+		self.offsets.extend(m.end() for m in newline.finditer(self.map))
+		if self.offsets[-1] < len(self.map):
+			# Final line without a newline.
+			self.offsets.append(len(self.map))
+
+	def __len__(self):
+		return len(self.offsets) - 1
+
+	def line(self, index):
+		l = self.map[self.offsets[index]:self.offsets[index+1]].decode(self.encoding)
+		if l[-2:] == '\r\n':
+			# Consistent with reading in text mode.
+			l = l[:-2] + '\n'
+		return l
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return [self.line(i) for i in range(*index.indices(len(self)))]
+
+		if index < 0:
+			index += len(self)
+		if index < 0 or index >= len(self):
+			raise IndexError(index)
+		return self.line(index)
+
 def interpret_dictionary_items(items):
 	return {
 		i[2]['identifier']: (nodes.document.export(i[1][0][1]), i[1][1][1])
@@ -202,9 +252,14 @@ def undocumented_field_item(resolve, element, node, identifier, cast, documentat
 
 	return i
 
-class Text(comethod.object):
+class Materialization(comethod.object):
 	"""
-	# Materialization routines for source elements.
+	# Traversal of the elements of a source shared by &Text and &Structure.
+
+	# The documentation of each element is rewritten and integrated here; the
+	# subclasses define the output through the `r_start`, `r_open`, `r_control`,
+	# `r_inheritance`, `r_documentation`, `r_signature`, and `r_syntax` methods.
+	# Each of these produces an iterable that the traversal yields from.
 	"""
 
 	def getdoc(self, path):
@@ -214,55 +269,48 @@ class Text(comethod.object):
 			return None
 		else:
 			if not isinstance(p, nodes.Cursor):
-				p = self.docs[path] = nodes.Cursor.from_chapter_text('\n'.join(p))
+				if self.cache is None:
+					p = nodes.Cursor.from_chapter_text('\n'.join(p))
+				else:
+					p = self.cache.cursor('\n'.join(p))
+				self.docs[path] = p
 
 		return p
 
-	def setdocs(self, path, cursor, section='Elements'):
-		tmap = extract(cursor, 'Elements')
-		self.docs.update(
-			(path + (k,), nodes.Cursor.from_chapter_content(('chapter', v[1], {})))
-			for k, v in tmap.items()
-		)
+	def inheritance(self, path, node):
+		"""
+		# Describe the type entries of the inheritance &node, consuming them.
 
-	def r_control(self, node, documented=True, element=(), **ctlkeys):
-		ctl = [
-			"! CONTROL:\n",
-			"\t/type/\n",
-			"\t\t" + node[0] + "\n",
-		]
-		for k, v in ctlkeys.items():
-			if v is not None:
-				ctl.extend([
-					"\t/" + k + "/\n",
-					"\t\t" + v + "\n",
-				])
+		# [ Returns ]
+		# The area and the type descriptions of each entry.
+		"""
+		described = []
 
-		flags = set()
-		if not documented:
-			flags.add('undocumented')
+		resolve = self.resolution.partial(path)
+		while node[1]:
+			try:
+				area = node[1][0][2]['area']
+			except LookupError:
+				area = None
+			described.append((area, list(describe_type(resolve, node))))
 
-		if flags:
-			ctl.append("\t/flags/\n")
-			for f in flags:
-				ctl.append("\t\t- `" + f + "`\n")
+			# &describe_type presumes a single type entry for a node.
+			del node[1][:1]
 
-		# Element properties.
-		ctl.append("\t/element/\n")
-		try:
-			area = node[2]['area']
-		except LookupError:
-			ctl.append("\t\t- (source/area)``\n")
-		else:
-			ctl.append("\t\t- (source/area)`{0[0]} {0[1]} {1[0]} {1[1]}`\n".format(*area))
+		return described
 
-		if element:
-			ctl.extend(render.elements([('set', element, {})], adjustment=2))
+	def r_inherits(self, path, node):
+		return self.r_inheritance(path, self.inheritance(path, node))
 
-		return ctl
+	def setdocs(self, path, cursor, section='Elements'):
+		tmap = extract(cursor, 'Elements')
+		self.docs.update(
+			(path + (k,), nodes.Cursor.from_chapter_content(('chapter', v[1], {})))
+			for k, v in tmap.items()
+		)
 
 	def r_root(self, elements):
-		yield from self.r_control(elements, syntax=elements[2].get('syntax', None))
+		yield from self.r_start(elements, self.r_control(elements, syntax=elements[2].get('syntax', None)))
 
 		doc = self.getdoc(())
 		if doc is not None:
@@ -278,40 +326,14 @@ class Text(comethod.object):
 			# Rewrite ambiguous references found in the documentation.
 			if r[1]:
 				r = self.resolution.rewrite((), r)
-				yield from render.chapter(r)
+				yield from self.r_documentation((), r)
 
 		yield from self.switch((), elements[1])
 
-	def r_inherits(self, path, node):
-		lines = []
-
-		resolve = self.resolution.partial(path)
-		while node[1]:
-			lines = ["! INHERIT:\n"]
-			typnode = node[1][0]
-
-			try:
-				area = typnode[2]['area']
-			except LookupError:
-				lines.append("\t- (source/area)``\n")
-			else:
-				lines.append("\t- (source/area)`{0[0]} {0[1]} {1[0]} {1[1]}`\n".format(*area))
-
-			typdata = list(map(property_item, describe_type(resolve, node)))
-			lines.extend(render.elements([('set', typdata, {})], adjustment=1))
-
-			# &describe_type presumes a single type entry for a node.
-			del node[1][:1]
-
-		return lines
-
 	@comethod('class')
 	@comethod('structure')
 	@comethod('exception')
 	def r_container(self, path, node):
-		yield self.newline
-		yield self.section(0, None, path)
-
 		typdata = None
 		inherits = ()
 		offset = 0
@@ -327,7 +349,7 @@ class Text(comethod.object):
 			pass
 
 		doc = self.getdoc(path)
-		yield from self.r_control(node, documented=bool(doc), element=typdata)
+		yield from self.r_open(path, self.r_control(node, documented=bool(doc), element=typdata))
 
 		# Collect inheritance if any is specified and increment offset for &switch.
 		try:
@@ -352,7 +374,7 @@ class Text(comethod.object):
 			# Rewrite ambiguous references found in the documentation.
 			r = self.resolution.rewrite(path, doc.root[0])
 			prefix(path, r)
-			yield from render.chapter(r)
+			yield from self.r_documentation(path, r)
 
 		yield from self.switch(path, subnodes[offset:])
 
@@ -365,11 +387,6 @@ class Text(comethod.object):
 			else:
 				yield nid, False, undocumented_field_item(resolve, node, n, nid, 'parameter')
 
-	def section(self, rdepth, rmult, path):
-		p = render.section_path(rdepth, rmult, *path)
-		p.append("\n")
-		return "".join(p)
-
 	@comethod('include')
 	def r_void(self, path, node):
 		"""
@@ -383,7 +400,7 @@ class Text(comethod.object):
 		# Rewrite references in the text tree and render the changes.
 		"""
 		r = self.resolution.rewrite(path, node)
-		yield from render.chapter(r)
+		yield from self.r_documentation(path, r)
 
 	@comethod('define')
 	@comethod('data')
@@ -396,19 +413,14 @@ class Text(comethod.object):
 		# Retrieve the type element.
 		resolve = self.resolution.partial(path)
 		typdata = list(map(property_item, describe_type(resolve, node)))
-
-		yield self.newline
-		yield self.section(0, None, path)
-		yield from self.r_control(node, documented=bool(doc), element=typdata)
+		yield from self.r_open(path, self.r_control(node, documented=bool(doc), element=typdata))
 
 		if doc is not None:
 			if doc.root[0][1]:
 				r = self.resolution.rewrite(path, doc.root[0])
-				yield from render.chapter(r)
+				yield from self.r_documentation(path, r)
 
-		yield "#!source\n"
-		for x in itruncate(self.selectlines(node)):
-			yield "\t" + x
+		yield from self.r_syntax(path, itruncate(self.selectlines(node)))
 
 	def r_element(self, path, node):
 		"""
@@ -418,15 +430,12 @@ class Text(comethod.object):
 		# section, integrate it into the element's section along with
 		# any undocumented parameters.
 		"""
-		yield self.newline
-		yield self.section(0, None, path)
-
 		doc = self.getdoc(path)
 
 		# Retrieve the type of the element.
 		resolve = self.resolution.partial(path)
 		typdata = list(map(property_item, describe_type(resolve, node)))
-		yield from self.r_control(node, documented=bool(doc), element=typdata)
+		yield from self.r_open(path, self.r_control(node, documented=bool(doc), element=typdata))
 
 		param_nodes = []
 		try:
@@ -466,16 +475,12 @@ class Text(comethod.object):
 				x[1][2].get('syntax', x[0]) for x in param_nodes
 				if x[0] in documented or x[1][0] != 'option'
 			)
-			sig = '(signature)' + "`%s(%s)`" % (path[-1], ", ".join(dparams))
-			sig += self.newline
-			yield sig
-			# Break for paragraph.
-			yield self.newline
+			yield from self.r_signature(path, "%s(%s)" % (path[-1], ", ".join(dparams)))
 
 		# Rewrite ambiguous references found in the documentation.
 		if r[1]:
 			r = self.resolution.rewrite(path, r)
-			yield from render.chapter(r)
+			yield from self.r_documentation(path, r)
 
 	def switch(self, path, nodes, *suffix):
 		for x in nodes:
@@ -489,8 +494,7 @@ class Text(comethod.object):
 
 	@tools.cachedproperty
 	def source(self):
-		with self.source_path.fs_open('r') as f:
-			return list(f)
+		return Lines(str(self.source_path))
 
 	def selectlines(self, node):
 		start, stop = node[2]['area']
@@ -501,14 +505,259 @@ class Text(comethod.object):
 		lines[-1] = lines[-1] + suffix
 		return lines
 
-	def __init__(self, resolution, elements, docs, data, source):
+	def __init__(self, resolution, elements, docs, data, source, cache=None):
 		self.resolution = resolution
+		self.cache = cache
 		self.elements = elements
 		self.source_path = source
 		self.newline = "\n"
 		self.docs = docs
 		self.data = data
 
+class Text(Materialization):
+	"""
+	# Materialization routines for source elements producing the text of the chapter.
+	"""
+
+	def r_control(self, node, documented=True, element=(), **ctlkeys):
+		ctl = [
+			"! CONTROL:\n",
+			"\t/type/\n",
+			"\t\t" + node[0] + "\n",
+		]
+		for k, v in ctlkeys.items():
+			if v is not None:
+				ctl.extend([
+					"\t/" + k + "/\n",
+					"\t\t" + v + "\n",
+				])
+
+		flags = set()
+		if not documented:
+			flags.add('undocumented')
+
+		if flags:
+			ctl.append("\t/flags/\n")
+			for f in flags:
+				ctl.append("\t\t- `" + f + "`\n")
+
+		# Element properties.
+		ctl.append("\t/element/\n")
+		try:
+			area = node[2]['area']
+		except LookupError:
+			ctl.append("\t\t- (source/area)``\n")
+		else:
+			ctl.append("\t\t- (source/area)`{0[0]} {0[1]} {1[0]} {1[1]}`\n".format(*area))
+
+		if element:
+			ctl.extend(render.elements([('set', element, {})], adjustment=2))
+
+		return ctl
+
+	def r_start(self, elements, control):
+		return control
+
+	def r_open(self, path, control):
+		yield self.newline
+		yield self.section(0, None, path)
+		yield from control
+
+	def r_inheritance(self, path, described):
+		if not described:
+			return []
+
+		area, types = described[-1]
+		lines = ["! INHERIT:\n"]
+		if area is None:
+			lines.append("\t- (source/area)``\n")
+		else:
+			lines.append("\t- (source/area)`{0[0]} {0[1]} {1[0]} {1[1]}`\n".format(*area))
+
+		typdata = list(map(property_item, types))
+		lines.extend(render.elements([('set', typdata, {})], adjustment=1))
+		return lines
+
+	def r_documentation(self, path, r):
+		return render.chapter(r)
+
+	def r_signature(self, path, signature):
+		yield '(signature)' + "`%s`" % (signature,) + self.newline
+		# Break for paragraph.
+		yield self.newline
+
+	def r_syntax(self, path, lines):
+		yield "#!source\n"
+		for x in lines:
+			yield "\t" + x
+
+	def section(self, rdepth, rmult, path):
+		p = render.section_path(rdepth, rmult, *path)
+		p.append("\n")
+		return "".join(p)
+
+def text_paragraph(string):
+	return Paragraph.of(Fragment(('text/normal', string)))
+
+def literal_paragraph(cast, string):
+	return Paragraph.of(Fragment(('literal/grave-accent' + cast, string)))
+
+class Structure(Materialization):
+	"""
+	# Materialization routines for source elements constructing the element tree
+	# of the chapter directly.
+
+	# The tree has the shape of the one parsed from the text produced by &Text
+	# after &.html.integrate: the CONTROL metadata is stored in the `control`
+	# attribute of the sections rather than as admonitions. Content is added to
+	# the most recently opened section, and sections are placed within the
+	# section of their nearest ancestor path, just as when the text is parsed.
+	"""
+
+	def __init__(self, *args, **kw):
+		super().__init__(*args, **kw)
+		self.root = None
+		self.current = None
+		self.sections = {}
+
+	def emit(self, *nodes):
+		self.current[1].extend(nodes)
+
+	def r_root(self, elements):
+		for x in super().r_root(elements):
+			pass
+		return self.root
+
+	def r_control(self, node, documented=True, element=(), **ctlkeys):
+		ctl = {'type': text_paragraph(node[0])}
+		for k, v in ctlkeys.items():
+			if v is not None:
+				ctl[k] = text_paragraph(v)
+
+		if not documented:
+			ctl['flags'] = [literal_paragraph('', 'undocumented')]
+
+		# Element properties.
+		try:
+			area = node[2]['area']
+		except LookupError:
+			area = ''
+		else:
+			area = "{0[0]} {0[1]} {1[0]} {1[1]}".format(*area)
+
+		properties = [literal_paragraph('/source/area', area)]
+		properties.extend(x[1][0][1] for x in (element or ()))
+		ctl['element'] = properties
+
+		return ctl
+
+	def r_start(self, elements, control):
+		self.root = self.current = ('chapter', [], {'control': control})
+		return ()
+
+	def r_open(self, path, control):
+		"""
+		# Start the section of the element at &path.
+		"""
+		node = ('section', [], {
+			'identifier': path[-1],
+			'absolute': path,
+			'selector-level': 0,
+			'selector-multiple': None,
+			'selector-path': path,
+			'control': control,
+		})
+
+		parent = self.root
+		for i in range(len(path) - 1, 0, -1):
+			if path[:i] in self.sections:
+				parent = self.sections[path[:i]]
+				break
+
+		parent[1].append(node)
+		self.sections[path] = node
+		self.current = node
+		return ()
+
+	def r_inheritance(self, path, described):
+		if not described:
+			return ()
+
+		area, types = described[-1]
+		if area is None:
+			area = ''
+		else:
+			area = "{0[0]} {0[1]} {1[0]} {1[1]}".format(*area)
+
+		items = [property_item(Fragment(('literal/grave-accent/source/area', area)))]
+		items.extend(map(property_item, types))
+		self.emit(('admonition', [('set', items, {})], {'type': 'INHERIT'}))
+		return ()
+
+	def r_documentation(self, path, r):
+		self.emit(*r[1])
+		return ()
+
+	def r_signature(self, path, signature):
+		self.emit(('paragraph', literal_paragraph('/signature', signature), {}))
+		return ()
+
+	def r_syntax(self, path, lines):
+		self.emit(('syntax', [
+			('line', [x.rstrip('\n')], {})
+			for x in lines
+		], {'type': 'source'}))
+		return ()
+
+class Composite(Materialization):
+	"""
+	# Materialization producing the text of the chapter with &Text while constructing
+	# its element tree with &Structure in the same traversal.
+
+	# [ Properties ]
+	# /text/
+		# The &Text producing the chapter text.
+	# /structure/
+		# The &Structure holding the element tree.
+	"""
+
+	def __init__(self, *args, **kw):
+		super().__init__(*args, **kw)
+		self.text = Text(*args, **kw)
+		self.structure = Structure(*args, **kw)
+
+	def r_control(self, node, documented=True, element=(), **ctlkeys):
+		return (
+			self.text.r_control(node, documented=documented, element=element, **ctlkeys),
+			self.structure.r_control(node, documented=documented, element=element, **ctlkeys),
+		)
+
+	def r_start(self, elements, control):
+		self.structure.r_start(elements, control[1])
+		return self.text.r_start(elements, control[0])
+
+	def r_open(self, path, control):
+		self.structure.r_open(path, control[1])
+		return self.text.r_open(path, control[0])
+
+	def r_inherits(self, path, node):
+		# Resolved once for both.
+		described = self.inheritance(path, node)
+		self.structure.r_inheritance(path, described)
+		return self.text.r_inheritance(path, described)
+
+	def r_documentation(self, path, r):
+		self.structure.r_documentation(path, r)
+		return self.text.r_documentation(path, r)
+
+	def r_signature(self, path, signature):
+		self.structure.r_signature(path, signature)
+		return self.text.r_signature(path, signature)
+
+	def r_syntax(self, path, lines):
+		self.structure.r_syntax(path, lines)
+		return self.text.r_syntax(path, lines)
+
 def split_element(project, factor):
 	"""
 	# Given a project relative factor path, split the path isolating
@@ -540,10 +789,85 @@ def relation(origin, target):
 	else:
 		return 'remote'
 
-def dr_absolute_path(requirements, context, project, reference):
+class Symbols(object):
+	"""
+	# Table of the factors of the projects in a context.
+
+	# Maps the absolute factor paths of every project in the context to the project
+	# and the project relative factor path so that absolute references can be
+	# identified without splitting the path for each reference.
+	"""
+
+	def __init__(self, context):
+		self.table = {}
+		for pj in context.iterprojects():
+			pfactor = str(pj.factor)
+			for ((path, type), x) in pj.select(lsf.types.factor):
+				self.table[pfactor + '.' + str(path)] = (pj, path)
+
+	def lookup(self, reference:str):
+		"""
+		# Identify the project, factor, and element of the absolute &reference.
+
+		# [ Returns ]
+		# The triple of the project, the project relative factor path, and the element
+		# path string or &None if the reference identifies the factor itself.
+		# &None if no factor in the context prefixes &reference.
+		"""
+		parts = reference.split('.')
+		for i in range(len(parts), 0, -1):
+			try:
+				pj, factor = self.table['.'.join(parts[:i])]
+			except KeyError:
+				continue
+			return pj, factor, ('.'.join(parts[i:]) or None)
+
+		return None
+
+# Released along with their context.
+_symbols = weakref.WeakKeyDictionary()
+def symbols(context) -> Symbols:
+	"""
+	# Retrieve the &Symbols of &context constructing the table on first use.
+	"""
+	try:
+		return _symbols[context]
+	except KeyError:
+		s = _symbols[context] = Symbols(context)
+		return s
+
+def dr_symbol(target_project, factor, element):
+	"""
+	# Construct the link, title, and target type of an entry identified by &Symbols.lookup.
+	# Equivalent to &split_element given the identified factor and element.
+	"""
+	pfactor = str(target_project.factor)
+
+	if element:
+		link = "{0}#{1}".format(str(factor), element)
+		title = "[{0}.{1}.{2}]".format(pfactor, str(factor), element)
+		target_type = 'factor-element'
+	else:
+		link = str(factor)
+		title = "[{0}.{1}]".format(pfactor, str(factor))
+		target_type = 'project-factor'
+
+	return link, title, target_type
+
+def dr_absolute_path(requirements, context, project, reference, symbols=None):
 	"""
 	# Resolve an absolute reference.
+
+	# When the &Symbols of the &context and &requirements are given as &symbols,
+	# they are consulted before splitting the path.
 	"""
+	if symbols is not None:
+		for table in symbols:
+			target = table.lookup(str(reference))
+			if target is not None:
+				link, title, target_type = dr_symbol(*target)
+				return dr_relate(project, target[0], link, title, target_type)
+
 	fpath = lsf.types.factor@reference
 	try:
 		target = context.split(fpath)
@@ -559,9 +883,16 @@ def dr_absolute_path(requirements, context, project, reference):
 		link, title, target_type = split_element(target_project, factor)
 	else:
 		target_type = 'project-name'
-		link = str(path)
+		link = str(fpath)
 		title = ''
 
+	return dr_relate(project, target_project, link, title, target_type)
+
+def dr_relate(project, target_project, link, title, target_type):
+	"""
+	# Adjust the &link of an absolute reference according to the relation
+	# of &target_project to &project.
+	"""
 	rel = relation(project, target_project)
 	if rel == 'remote':
 		link = target_project.identifier + '/' + link
@@ -573,9 +904,12 @@ def dr_absolute_path(requirements, context, project, reference):
 
 	return title, link, target_type, rel
 
-def dr_context_path(context, project, reference):
+def dr_context_path(context, project, reference, symbols=None):
 	"""
 	# Resolve a root-Context relative reference.
+
+	# When the &Symbols of the &context is given as &symbols,
+	# it is consulted before splitting the path.
 	"""
 	local = 'context-local'
 	target_type = None
@@ -585,18 +919,27 @@ def dr_context_path(context, project, reference):
 	cpath = cpath.container
 
 	path = cpath@reference
-	try:
-		product, target_project, factor = context.split(path)
-	except LookupError:
-		return '[' + str(path) + ']', 'http://fault.io/dev/null', 'invalid', 'none'
+	target = None
+	if symbols is not None:
+		target = symbols.lookup(str(path))
 
-	if factor:
-		link, title, target_type = split_element(target_project, factor)
+	if target is not None:
+		target_project = target[0]
+		link, title, target_type = dr_symbol(*target)
 		link = str(target_project.factor) + '/' + link
 	else:
-		target_type = 'project-name'
-		link = str(path)
-		title = ''
+		try:
+			product, target_project, factor = context.split(path)
+		except LookupError:
+			return '[' + str(path) + ']', 'http://fault.io/dev/null', 'invalid', 'none'
+
+		if factor:
+			link, title, target_type = split_element(target_project, factor)
+			link = str(target_project.factor) + '/' + link
+		else:
+			target_type = 'project-name'
+			link = str(path)
+			title = ''
 
 	if target_project.identifier == project.identifier:
 		# self reference
@@ -624,37 +967,385 @@ def dr_project_path(project, reference):
 
 	return title, link
 
-def index(root, deque=collections.deque, none={}):
+class Index(dict):
+	"""
+	# Element index mapping identifier paths to the element and the set
+	# of identifiers of its subnodes.
+
+	# [ Properties ]
+	# /occurrences/
+		# Reverse index mapping identifiers to the paths of the elements containing
+		# a subnode with that identifier. The paths are the keys of a dictionary
+		# used as an ordered set.
+	"""
+
+	def __init__(self):
+		super().__init__()
+		self.occurrences = collections.defaultdict(dict)
+
+	def __setitem__(self, path, entry):
+		# Replaced entries occur when siblings share an identifier.
+		replaced = self.get(path)
+		if replaced is not None:
+			for x in replaced[1]:
+				self.occurrences[x].pop(path, None)
+
+		super().__setitem__(path, entry)
+		for x in entry[1]:
+			if x is not None:
+				self.occurrences[x][path] = None
+
+	def extend(self, path, nodes, deque=collections.deque):
+		"""
+		# Index the &nodes as subnodes of the indexed element at &path.
+		"""
+		subnodes = self[path][1]
+		for x in nodes:
+			i = x[2].get('identifier')
+			subnodes.add(i)
+			if i is not None:
+				self.occurrences[i][path] = None
+
+		q = deque()
+		q.extend((path, x) for x in nodes)
+		while q:
+			p, n = q.popleft()
+			try:
+				ni = n[2].get('identifier')
+			except KeyError:
+				print(n)
+				continue
+			except IndexError:
+				continue
+
+			# Descend
+			if ni:
+				sp = p + (ni,)
+				try:
+					subnodes = set(x[2].get('identifier') for x in n[1])
+				except IndexError:
+					subnodes = set()
+				subnodes.discard(None)
+				self[sp] = (n, subnodes)
+				q.extend((sp, x) for x in n[1])
+
+def index(root):
 	"""
 	# Construct an index of elements using the identifier paths.
 	"""
-	subnodes = set(x[2].get('identifier') for x in root[1])
-	idx = {(): (root, subnodes)}
+	idx = Index()
+	idx[()] = (root, set())
+	idx.extend((), root[1])
+	return idx
+
+class Subnodes(object):
+	"""
+	# Set of the identifiers of the subnodes of an element in a &CompactIndex.
+	"""
+	__slots__ = ('index', 'start', 'stop')
+
+	def __init__(self, index, start, stop):
+		self.index = index
+		self.start = start
+		self.stop = stop
+
+	def __contains__(self, identifier):
+		k = self.index.identifiers.get(identifier)
+		if k is None:
+			return False
+
+		keys = self.index.keys
+		i = bisect.bisect_left(keys, k, self.start, self.stop)
+		return i < self.stop and keys[i] == k
+
+	def __iter__(self):
+		names = self.index.names
+		return iter(dict.fromkeys(names[k] for k in self.index.keys[self.start:self.stop]))
+
+	def __len__(self):
+		return sum(1 for x in self)
+
+class Containers(object):
+	"""
+	# Set of the paths of the elements of a &CompactIndex containing
+	# a subnode with a given identifier.
+	"""
+	__slots__ = ('index', 'key')
+
+	def __init__(self, index, key):
+		self.index = index
+		self.key = key
+
+	def __contains__(self, path):
+		idx = self.index
+		i = idx.number(path)
+		if i is None:
+			return False
+
+		keys = idx.keys
+		stop = idx.kfirst[i + 1]
+		j = bisect.bisect_left(keys, self.key, idx.kfirst[i], stop)
+		return j < stop and keys[j] == self.key
+
+	def __iter__(self):
+		return map(self.index.path, self.index.containers[self.key])
+
+	def __len__(self):
+		return len(self.index.containers[self.key])
+
+class Occurrences(object):
+	"""
+	# Mapping of identifiers to the paths of the elements of a &CompactIndex
+	# containing a subnode with that identifier. Equivalent to &Index.occurrences.
+	"""
+	__slots__ = ('index',)
+
+	def __init__(self, index):
+		self.index = index
+
+	def get(self, identifier, default=None):
+		idx = self.index
+		idx.seal()
+
+		k = idx.identifiers.get(identifier)
+		if k is None or k not in idx.containers:
+			return default
+		return Containers(idx, k)
+
+	def __getitem__(self, identifier):
+		paths = self.get(identifier)
+		if paths is None:
+			raise KeyError(identifier)
+		return paths
+
+class CompactIndex(object):
+	"""
+	# Element index holding the structure of the elements in arrays.
+
+	# Provides the `get`, membership, and &occurrences interfaces of &Index used by
+	# &match, &locate, and &Resolution. Identifiers are interned, and each indexed path
+	# is numbered with its parent and identifier stored in arrays. The paths of subnodes
+	# and the identifiers of the subnodes of each element are stored as ranges of arrays
+	# sorted by identifier, so lookups and membership tests are performed by bisection.
+
+	# As with &Index, a path identifies the last element indexed at that path.
+
+	# The arrays are constructed by &seal when the index is first queried after
+	# elements have been added by &extend.
+
+	# [ Properties ]
+	# /names/
+		# The identifiers by their interned number.
+	# /nodes/
+		# The element at each numbered path. The root is `0`.
+	"""
+
+	def __init__(self, root):
+		self.names = []
+		self.identifiers = {}
+		self.nodes = [root]
+		self.parents = array.array('l', [-1])
+		self.idents = array.array('l', [-1])
+		self.stamps = array.array('q', [0])
+		self.count = 0
+
+		# Sealed form.
+		self.sealed = False
+		self.keys = array.array('l')
+		self.kfirst = array.array('l', [0, 0])
+
+		# Construction state; discarded by &seal.
+		self.lookup = {}
+		self.members = {}
+
+		self.extend((), root[1])
+
+	def intern(self, identifier):
+		try:
+			return self.identifiers[identifier]
+		except KeyError:
+			k = self.identifiers[identifier] = len(self.names)
+			self.names.append(identifier)
+			return k
+
+	def unseal(self):
+		if not self.sealed:
+			return
 
-	q = deque()
-	q.extend(((), x) for x in root[1])
-	while q:
-		p, n = q.popleft()
+		parents = self.parents
+		idents = self.idents
+		self.lookup = {
+			(parents[i], idents[i]): i
+			for i in range(1, len(self.nodes))
+		}
+		self.members = {}
+		self.sealed = False
+
+	def subnodes(self, i):
+		"""
+		# Retrieve the mutable set of the identifiers of the subnodes of &i during construction.
+		"""
 		try:
-			ni = n[2].get('identifier')
+			return self.members[i]
 		except KeyError:
-			print(n)
-			continue
-		except IndexError:
-			continue
-
-		# Descend
-		if ni:
-			sp = p + (ni,)
+			if i + 1 < len(self.kfirst):
+				m = set(self.keys[self.kfirst[i]:self.kfirst[i + 1]])
+			else:
+				m = set()
+			self.members[i] = m
+			return m
+
+	def extend(self, path, nodes, deque=collections.deque):
+		"""
+		# Index the &nodes as subnodes of the indexed element at &path.
+		"""
+		parent = self.number(path)
+		if parent is None:
+			raise KeyError(path)
+		self.unseal()
+
+		m = self.subnodes(parent)
+		for x in nodes:
+			i = x[2].get('identifier')
+			if i is not None:
+				m.add(self.intern(i))
+
+		q = deque((parent, x) for x in nodes)
+		while q:
+			p, n = q.popleft()
 			try:
-				subnodes = set(x[2].get('identifier') for x in n[1])
-			except IndexError:
-				subnodes = set()
-			subnodes.discard(None)
-			idx[sp] = (n, subnodes)
-			q.extend((sp, x) for x in n[1])
+				ni = n[2].get('identifier')
+			except (KeyError, IndexError):
+				continue
+
+			# Descend
+			if ni:
+				self.count += 1
+				key = (p, self.intern(ni))
+				i = self.lookup.get(key)
+				if i is None:
+					i = self.lookup[key] = len(self.nodes)
+					self.nodes.append(n)
+					self.parents.append(p)
+					self.idents.append(key[1])
+					self.stamps.append(self.count)
+				else:
+					# Replaced by a sibling with the same identifier.
+					self.nodes[i] = n
+					self.stamps[i] = self.count
 
-	return idx
+				try:
+					sub = set(x[2].get('identifier') for x in n[1])
+				except IndexError:
+					sub = set()
+				sub.discard(None)
+				self.members[i] = set(map(self.intern, sub))
+
+				q.extend((i, x) for x in n[1])
+
+	def seal(self):
+		"""
+		# Construct the sorted arrays of the indexed paths, the identifiers
+		# of the subnodes of each element, and the &occurrences.
+		"""
+		if self.sealed:
+			return
+
+		parents = self.parents
+		idents = self.idents
+		n = len(self.nodes)
+
+		keys = array.array('l')
+		kfirst = array.array('l', [0]) * (n + 1)
+		for i in range(n):
+			kfirst[i] = len(keys)
+			if i in self.members:
+				keys.extend(sorted(self.members[i]))
+			elif i + 1 < len(self.kfirst):
+				keys.extend(self.keys[self.kfirst[i]:self.kfirst[i + 1]])
+		kfirst[n] = len(keys)
+		self.keys = keys
+		self.kfirst = kfirst
+
+		# Paths ordered by parent and then identifier.
+		order = sorted(range(1, n), key=(lambda i: (parents[i], idents[i])))
+		self.children = array.array('l', order)
+		self.ckeys = array.array('l', (idents[i] for i in order))
+		self.cfirst = array.array('l', [0]) * (n + 1)
+		for i in order:
+			self.cfirst[parents[i] + 1] += 1
+		for i in range(n):
+			self.cfirst[i + 1] += self.cfirst[i]
+
+		# Ordered as the paths were last indexed, like &Index.occurrences.
+		containers = {}
+		for i in sorted(range(n), key=self.stamps.__getitem__):
+			for k in keys[kfirst[i]:kfirst[i + 1]]:
+				containers.setdefault(k, array.array('l')).append(i)
+		self.containers = containers
+
+		self.lookup = None
+		self.members = None
+		self.sealed = True
+
+	def number(self, path):
+		"""
+		# Identify the number of the indexed &path; &None if it is not indexed.
+		"""
+		if not path:
+			return 0
+
+		self.seal()
+		ckeys = self.ckeys
+		i = 0
+		for x in path:
+			k = self.identifiers.get(x)
+			if k is None:
+				return None
+
+			start = self.cfirst[i]
+			stop = self.cfirst[i + 1]
+			j = bisect.bisect_left(ckeys, k, start, stop)
+			if j == stop or ckeys[j] != k:
+				return None
+			i = self.children[j]
+
+		return i
+
+	def path(self, i):
+		"""
+		# Construct the indexed path numbered &i.
+		"""
+		p = []
+		while i > 0:
+			p.append(self.names[self.idents[i]])
+			i = self.parents[i]
+		p.reverse()
+		return tuple(p)
+
+	@property
+	def occurrences(self):
+		return Occurrences(self)
+
+	def get(self, path, default=None):
+		i = self.number(path)
+		if i is None:
+			return default
+
+		self.seal()
+		return (self.nodes[i], Subnodes(self, self.kfirst[i], self.kfirst[i + 1]))
+
+	def __getitem__(self, path):
+		entry = self.get(path)
+		if entry is None:
+			raise KeyError(path)
+		return entry
+
+	def __contains__(self, path):
+		return self.number(path) is not None
+
+	def __len__(self):
+		return len(self.nodes)
 
 def match(index, path, subpath):
 	"""
@@ -701,18 +1392,65 @@ def find(index, path:typing.Sequence[str], rpath:typing.Sequence[str]):
 	matches.sort(key=(lambda x: (x[0], len(x[1]))), reverse=True)
 	return matches
 
+def locate(index:Index, path:typing.Sequence[str], rpath:typing.Sequence[str]):
+	"""
+	# Find all the matches for &rpath in &index that are ancestors of &path.
+
+	# Equivalent to &find, but only considers the ancestors present in the
+	# &Index.occurrences of the first identifier in &rpath.
+	"""
+	containers = index.occurrences.get(rpath[0])
+	if not containers:
+		return []
+
+	matches = []
+	for i in range(len(path), -1, -1):
+		parent = path[:i]
+		if parent in containers:
+			matches.append((match(index, parent, rpath), parent))
+
+	matches.sort(key=(lambda x: (x[0], len(x[1]))), reverse=True)
+	return matches
+
 class Resolution(comethod.object):
 	"""
 	# Reference resolution interface for factored projects.
+
+	# Resolved references are cached. References relative to the element index are
+	# held in a cache that is cleared when a new index is installed by &add_index,
+	# and project, context, and absolute references are held for the lifetime of
+	# the instance. Each cache is limited to &capacity entries, least recently used
+	# entries being evicted first.
+
+	# The element indexes are constructed by &indexer; &index or &CompactIndex.
+
+	# [ Properties ]
+	# /statistics/
+		# Counters of the cache `hits`, `misses`, and `evictions`, and the number of
+		# references resolved as `invalid`, cached or not.
 	"""
 
-	def __init__(self, requirements, context, project, factor):
+	def __init__(self, requirements, context, project, factor, capacity=1024*8, indexer=index):
 		self.index = None
+		self.indexer = indexer
 		self.requirements = requirements
 		self.context = context
 		self.project = project
 		self.factor = factor
 
+		self.capacity = capacity
+		self.local_cache = collections.OrderedDict()
+		self.context_cache = collections.OrderedDict()
+		self.statistics = collections.Counter(hits=0, misses=0, evictions=0, invalid=0)
+
+	@tools.cachedproperty
+	def symbols(self):
+		"""
+		# The &Symbols of the context and the requirements; shared by all
+		# &Resolution instances using the same contexts.
+		"""
+		return (symbols(self.context), symbols(self.requirements))
+
 	@comethod('key')
 	@comethod('paragraph')
 	def disambiguate(self, element, path, node, *suffix, AR=['reference', 'ambiguous']):
@@ -764,6 +1502,40 @@ class Resolution(comethod.object):
 		return root
 
 	def resolve(self, path, fragment, depth=0, titled=True):
+		"""
+		# Resolve the reference &fragment found in the documentation of the element at &path.
+		"""
+		reference = fragment.data
+		if reference[:1] in {'.', '@'}:
+			cache = self.context_cache
+			key = (fragment.type, reference, titled)
+		else:
+			cache = self.local_cache
+			key = (tuple(path), fragment.type, reference, titled)
+
+		try:
+			r = cache[key]
+		except KeyError:
+			self.statistics['misses'] += 1
+
+			r = cache[key] = self.identify(path, fragment, depth=depth, titled=titled)
+			if len(cache) > self.capacity:
+				cache.popitem(last=False)
+				self.statistics['evictions'] += 1
+		else:
+			self.statistics['hits'] += 1
+			cache.move_to_end(key)
+
+		# Factor-local misses are typed `invalid`, context and absolute misses `none/invalid`.
+		if 'invalid' in r.typepath[2:]:
+			self.statistics['invalid'] += 1
+
+		return r
+
+	def identify(self, path, fragment, depth=0, titled=True):
+		"""
+		# Resolve the reference &fragment without consulting the caches.
+		"""
 		local = ''
 		title = ''
 		name_type = ''
@@ -785,19 +1557,19 @@ class Resolution(comethod.object):
 		elif leading == 2:
 			# Corpus Relative; root context.
 			depth += 1
-			title, link, name_type, local = dr_context_path(self.context, self.project, reference.lstrip('.'))
+			title, link, name_type, local = dr_context_path(self.context, self.project, reference.lstrip('.'), self.symbols[0])
 		elif leading == 1:
 			# Project Relative.
 			title, link = dr_project_path(self.project, reference.lstrip('.'))
 			local = 'project-local'
 		else:
 			if reference[:1] == '@':
-				title, link, name_type, local = dr_absolute_path(self.requirements, self.context, self.project, reference[1:])
+				title, link, name_type, local = dr_absolute_path(self.requirements, self.context, self.project, reference[1:], self.symbols)
 			else:
 				# Element Context Relative.
 				local = 'factor-local'
 				rpath = reference.split('.')
-				targets = find(self.index, path, rpath)
+				targets = locate(self.index, path, rpath)
 				if targets:
 					mdepth, prefix = targets[0]
 					target = prefix + tuple(rpath[:mdepth])
@@ -817,7 +1589,7 @@ class Resolution(comethod.object):
 
 						target_factor = list(factor.iterpoints())
 						redirect = '.'.join(target_factor + target_element)
-						absdata = dr_absolute_path(self.requirements, self.context, self.project, redirect)
+						absdata = dr_absolute_path(self.requirements, self.context, self.project, redirect, self.symbols)
 						title, link, name_type, local = absdata
 					else:
 						name_type = target_node[0]
@@ -838,19 +1610,302 @@ class Resolution(comethod.object):
 		return tools.partial(self.resolve, path, **kw)
 
 	def add_index(self, elements):
-		self.index = index(elements)
+		self.index = self.indexer(elements)
+		self.local_cache.clear()
+
+class Stream(object):
+	"""
+	# Reader for the JSON files of delineation images that may contain trailing commas.
+
+	# The trailing commas are removed from each block as it is read, so the document
+	# is never copied or decoded twice. Only commas outside of strings that are
+	# followed by the end of an array or object are removed. Whether the scan is
+	# within a string or an escape is retained across blocks, and a comma at the
+	# end of a block is held until the following text is read.
+	"""
+
+	decoder = json.JSONDecoder()
+
+	# The characters changing the state of the scan within and outside of strings.
+	quoting = re.compile(r'["\\]')
+	delimiting = re.compile(r'[",]')
+	nonspace = re.compile(r'\S')
+
+	def __init__(self, file, size=1024*64):
+		self.file = file
+		self.size = size
+		self.buffer = ''
+		self.offset = 0
+
+		# Scan state.
+		self.pending = ''
+		self.quoted = False
+		self.escaped = False
+
+	def repair(self, data):
+		"""
+		# Remove the trailing commas from &data continuing the scan of the previous block.
+		"""
+		parts = []
+		start = 0
+		i = 0
+		n = len(data)
+
+		if self.pending:
+			m = self.nonspace.search(data)
+			if m is None:
+				self.pending += data
+				return ''
+
+			held = self.pending
+			self.pending = ''
+			parts.append(held[1:] if data[m.start()] in ']}' else held)
+			i = m.start()
+
+		while i < n:
+			if self.escaped:
+				self.escaped = False
+				i += 1
+			elif self.quoted:
+				m = self.quoting.search(data, i)
+				if m is None:
+					break
+
+				i = m.end()
+				if m.group() == '"':
+					self.quoted = False
+				else:
+					self.escaped = True
+			else:
+				m = self.delimiting.search(data, i)
+				if m is None:
+					break
+
+				i = m.end()
+				if m.group() == '"':
+					self.quoted = True
+					continue
+
+				# Comma; removed when followed by the end of an array or object.
+				c = m.start()
+				m = self.nonspace.search(data, i)
+				if m is None:
+					# Whether the comma is trailing depends on the following text.
+					parts.append(data[start:c])
+					self.pending = data[c:]
+					return ''.join(parts)
+
+				if data[m.start()] in ']}':
+					parts.append(data[start:c])
+					start = i
+				i = m.start()
+
+		parts.append(data[start:])
+		return ''.join(parts)
+
+	def block(self, size):
+		"""
+		# Read and repair the next block of text; empty at the end of the file.
+		"""
+		while True:
+			data = self.file.read(size)
+			if not data:
+				# End of file; the held comma is not trailing.
+				data = self.pending
+				self.pending = ''
+				return data
+
+			data = self.repair(data)
+			if data:
+				return data
+
+	def read(self, size=None):
+		"""
+		# Extend the buffer with the next block, discarding the consumed text.
+		"""
+		data = self.block(size or self.size)
+		if not data:
+			return False
+
+		self.buffer = self.buffer[self.offset:] + data
+		self.offset = 0
+		return True
+
+	def all(self):
+		"""
+		# Read the remainder of the file.
+		"""
+		blocks = [self.buffer[self.offset:]]
+		while True:
+			data = self.block(self.size)
+			if not data:
+				break
+			blocks.append(data)
+
+		self.buffer = ''
+		self.offset = 0
+		return ''.join(blocks)
+
+	def peek(self, whitespace=' \t\r\n'):
+		"""
+		# Skip whitespace and return the next character or an empty string at the end of the file.
+		"""
+		while True:
+			b = self.buffer
+			i = self.offset
+			n = len(b)
+			while i < n and b[i] in whitespace:
+				i += 1
+			self.offset = i
+
+			if i < n:
+				return b[i]
+			if not self.read():
+				return ''
+
+	def expect(self, *characters):
+		"""
+		# Consume the next character, raising a &json.decoder.JSONDecodeError
+		# if it is not one of &characters.
+		"""
+		c = self.peek()
+		if c not in characters or not c:
+			raise json.decoder.JSONDecodeError(
+				"expected one of " + repr(''.join(characters)),
+				self.buffer, self.offset
+			)
+
+		self.offset += 1
+		return c
+
+	def value(self):
+		"""
+		# Decode the next complete array, object, or string.
+		"""
+		self.peek()
+		while True:
+			try:
+				v, end = self.decoder.raw_decode(self.buffer, self.offset)
+			except json.decoder.JSONDecodeError:
+				# Presume the value is incomplete; double the buffered text
+				# so that large values are not decoded repeatedly.
+				if not self.read(max(self.size, len(self.buffer) - self.offset)):
+					raise
+			else:
+				self.offset = end
+				return v
+
+class Elements(object):
+	"""
+	# Incremental decoder of the root of an `elements.json` file.
+
+	# Iterating produces the top level subnodes of the root as they are decoded.
+	# Only the text of the subnode being decoded is held in memory.
+
+	# [ Properties ]
+	# /type/
+		# The element type of the root.
+	# /attributes/
+		# The attributes of the root; &None until the subnodes have been read.
+	"""
+
+	def __init__(self, file):
+		self.stream = Stream(file)
+		self.stream.expect('[')
+		self.type = self.stream.value()
+		self.attributes = None
+
+	def __iter__(self):
+		s = self.stream
+		s.expect(',')
+		s.expect('[')
+
+		if s.peek() != ']':
+			while True:
+				yield s.value()
+				if s.expect(',', ']') == ']':
+					break
+		else:
+			s.expect(']')
+
+		s.expect(',')
+		self.attributes = s.value()
+		s.expect(']')
 
 def load(f):
-	try:
-		return json.load(f)
-	except json.decoder.JSONDecodeError:
-		f.seek(0)
-		data = f.read()
-		data = data.replace(',]', ']')
-		data = data.replace(',}', '}')
-		return json.loads(data)
-
-def transform(resolution, datadir:files.Path, source:files.Path):
+	"""
+	# Decode the JSON document read from &f tolerating trailing commas.
+	"""
+	return json.loads(Stream(f).all())
+
+def load_elements(resolution, f):
+	"""
+	# Decode the elements read from &f indexing each top level subnode
+	# as it is decoded and install the index into &resolution.
+
+	# Peak memory is bounded by the decoded tree and the text of the largest
+	# top level element rather than the tree and the text of the entire file.
+	"""
+	stream = Elements(f)
+	elements = (stream.type, [], {})
+	resolution.add_index(elements)
+
+	for x in stream:
+		elements[1].append(x)
+		resolution.index.extend((), (x,))
+
+	elements[2].update(stream.attributes)
+	return elements
+
+# Section title prefix separating the documentation strings of a batch.
+batch_separator = 'documentation-batch '
+
+def parse_documentation(docs, separator=batch_separator):
+	"""
+	# Parse all the documentation strings in &docs as a single chapter
+	# and split the result back into a cursor for each element.
+
+	# Each string is preceded by a separator section whose content is the string's
+	# leading text; the sections of the string follow as the separator's siblings.
+
+	# [ Returns ]
+	# Dictionary associating the keys of &docs with &nodes.Cursor instances;
+	# &docs itself if the chapter did not split into the expected strings.
+	"""
+	keys = list(docs)
+	text = []
+	for i, k in enumerate(keys):
+		text.append("[ %s%d ]\n" %(separator, i))
+		text.append('\n'.join(docs[k]))
+		text.append("\n\n")
+
+	chapter = nodes.Cursor.from_chapter_text(''.join(text)).root[0]
+
+	batch = []
+	for x in chapter[1]:
+		if x[0] == 'section' and (x[2].get('identifier') or '').startswith(separator):
+			batch.append(('chapter', list(x[1]), {}))
+		elif batch:
+			batch[-1][1].append(x)
+
+	if len(batch) != len(keys):
+		return docs
+
+	return {
+		k: nodes.Cursor.from_chapter_content(c)
+		for k, c in zip(keys, batch)
+	}
+
+def materials(resolution, datadir:files.Path, stream=False, batch=False, cache=None):
+	"""
+	# Load the elements, documentation, and data of the delineation image &datadir
+	# and install the element index into &resolution.
+
+	# When &stream is &True, the elements are indexed as they are decoded by &load_elements.
+	# When &batch is &True, the documentation is parsed at once by &parse_documentation
+	# rather than as each element is materialized. When a &.cache.Trees instance
+	# is given as &cache, the trees it holds are used and those parsed in a batch are stored.
+	"""
 	re = (datadir/"elements.json")
 	dd = (datadir/"documented.json")
 	rd = (datadir/"documentation.json")
@@ -859,8 +1914,11 @@ def transform(resolution, datadir:files.Path, source:files.Path):
 	test_factor = (tf.fs_type() == 'file')
 
 	with re.fs_open('r') as f:
-		elements = load(f)
-		resolution.add_index(elements)
+		if stream:
+			elements = load_elements(resolution, f)
+		else:
+			elements = load(f)
+			resolution.add_index(elements)
 
 	try:
 		with dd.fs_open('r') as f:
@@ -871,6 +1929,21 @@ def transform(resolution, datadir:files.Path, source:files.Path):
 		keys = ()
 		strings = ()
 	docs = dict(zip(map(tuple,keys),strings))
+	if cache is not None:
+		for k, v in docs.items():
+			tree = cache.load('\n'.join(v))
+			if tree is not None:
+				docs[k] = nodes.Cursor.from_chapter_content(tree)
+
+	if batch:
+		misses = {k: v for k, v in docs.items() if not isinstance(v, nodes.Cursor)}
+		if misses:
+			parsed = parse_documentation(misses)
+			if parsed is not misses:
+				if cache is not None:
+					for k, c in parsed.items():
+						cache.store('\n'.join(misses[k]), c.root[0])
+				docs.update(parsed)
 
 	try:
 		with rt.fs_open('r') as f:
@@ -879,5 +1952,33 @@ def transform(resolution, datadir:files.Path, source:files.Path):
 	except:
 		data = dict()
 
-	t = Text(resolution, elements, docs, data, source)
+	return elements, docs, data
+
+def transform(resolution, datadir:files.Path, source:files.Path, stream=False, batch=False, cache=None):
+	"""
+	# Produce the chapter text of &source.
+	"""
+	elements, docs, data = materials(resolution, datadir, stream=stream, batch=batch, cache=cache)
+	t = Text(resolution, elements, docs, data, source, cache=cache)
 	return t.r_root(elements)
+
+def structure(resolution, datadir:files.Path, source:files.Path, stream=False, batch=False, cache=None):
+	"""
+	# Construct the element tree of the chapter of &source without producing its text.
+	"""
+	elements, docs, data = materials(resolution, datadir, stream=stream, batch=batch, cache=cache)
+	t = Structure(resolution, elements, docs, data, source, cache=cache)
+	return t.r_root(elements)
+
+def composite(resolution, datadir:files.Path, source:files.Path, stream=False, batch=False, cache=None):
+	"""
+	# Produce the chapter text of &source and construct its element tree
+	# with a single load and traversal of the delineation image.
+
+	# [ Returns ]
+	# The chapter text and the element tree.
+	"""
+	elements, docs, data = materials(resolution, datadir, stream=stream, batch=batch, cache=cache)
+	t = Composite(resolution, elements, docs, data, source, cache=cache)
+	text = ''.join(t.r_root(elements))
+	return text, t.structure.root
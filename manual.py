@@ -11,7 +11,7 @@ from fault.context import comethod
 from fault.text import nodes
 from fault.system import files
 
-from .tools import get_properties, interpret_property_fragment, interpret_properties
+from .tools import get_properties, interpret_property_fragment, interpret_properties, cursor
 from .html import prepare, formlink
 
 escape_characters = {
@@ -560,7 +560,10 @@ def join_synopsis_details(context, index, synsect='SYNOPSIS'):
 	return relation
 
 def transform(prefix, chapter, identifier='', type=''):
-	c = nodes.Cursor.from_chapter_text(chapter)
+	"""
+	# Render the &chapter text, or its element tree produced by &.tools.parse, as a manual page.
+	"""
+	c = cursor(chapter)
 	r, = c.root
 	idx, ctx = prepare(r)
 	rel = join_synopsis_details(ctx, idx)
@@ -0,0 +1,807 @@
+"""
+# Corpus archive member access and transfer.
+
+# Supports the construction of archives from the compressed members of
+# existing archives without inflating and deflating their contents.
+
+# Archives are either zip files or &Pack stores; &open selects
+# the implementation using the path's suffix. Zip files written with a
+# member index by &finish are read through a &Mapped instance.
+"""
+import io
+import os
+import json
+import itertools
+import hashlib
+import bisect
+import mmap
+import time
+import struct
+import sqlite3
+import urllib.parse
+import zipfile
+import zlib
+
+# Local file header layout; identical to the one used by &zipfile.
+local_header_format = '<4s2B4HL2L2H'
+local_header_size = struct.calcsize(local_header_format)
+local_header_signature = b'PK\x03\x04'
+
+def locate(fp, info:zipfile.ZipInfo) -> int:
+	"""
+	# Identify the offset of the compressed data of the member described by &info.
+	"""
+	fp.seek(info.header_offset)
+	header = fp.read(local_header_size)
+	fields = struct.unpack(local_header_format, header)
+	if fields[0] != local_header_signature:
+		raise zipfile.BadZipFile("bad local file header: " + info.filename)
+
+	return info.header_offset + local_header_size + fields[10] + fields[11]
+
+def rawdata(archive:zipfile.ZipFile, info:zipfile.ZipInfo) -> bytes:
+	"""
+	# Read the compressed data of the member described by &info.
+	"""
+	with archive._lock:
+		fp = archive.fp
+		fp.seek(locate(fp, info))
+		return fp.read(info.compress_size)
+
+def insert(target:zipfile.ZipFile, info:zipfile.ZipInfo, data:bytes, name=None) -> zipfile.ZipInfo:
+	"""
+	# Append a member whose compressed &data is described by &info into &target.
+	"""
+	if not isinstance(target, zipfile.ZipFile):
+		return target.insert(info, data, name=name)
+
+	zi = zipfile.ZipInfo(name or info.filename, info.date_time)
+	zi.compress_type = info.compress_type
+	zi.CRC = info.CRC
+	zi.file_size = info.file_size
+	zi.compress_size = len(data)
+	zi.external_attr = info.external_attr
+	zi.create_system = info.create_system
+	zi.comment = info.comment
+	# The sizes and CRC are known, so the data descriptor is not used.
+	zi.flag_bits = info.flag_bits & ~0x08
+
+	with target._lock:
+		if target._writing:
+			raise ValueError("archive has an open member writer")
+
+		target.fp.seek(target.start_dir)
+		zi.header_offset = target.start_dir
+		target.fp.write(zi.FileHeader())
+		target.fp.write(data)
+		target.start_dir = target.fp.tell()
+		target.filelist.append(zi)
+		target.NameToInfo[zi.filename] = zi
+		target._didModify = True
+
+	return zi
+
+def transfer(source:zipfile.ZipFile, target:zipfile.ZipFile, name:str, rename=None) -> zipfile.ZipInfo:
+	"""
+	# Copy the member identified by &name from &source into &target
+	# without decompressing it.
+	"""
+	info, data = raw(source, name)
+	return insert(target, info, data, name=rename)
+
+# Extensions of media types whose content is already compressed.
+incompressible = {
+	'png', 'jpg', 'jpeg', 'gif', 'webp', 'ico',
+	'woff', 'woff2', 'gz', 'zip', 'xz', 'bz2',
+}
+
+class Policy(object):
+	"""
+	# Compression method and level selection for archive members.
+
+	# Members smaller than the threshold or whose media type is already compressed
+	# are stored. Chapters are deflated at the chapter level, large JSON members at
+	# the bulk level, and everything else at the default level.
+
+	# [ Properties ]
+	# /statistics/
+		# Totals of the recorded members keyed by the method and level used.
+		# Each entry is a list holding the member count, the uncompressed size,
+		# the compressed size, and the seconds spent compressing.
+	"""
+
+	def __init__(self, threshold=128, bulk=(1 << 16), level=6, bulk_level=1, chapter_level=9):
+		self.threshold = threshold
+		self.bulk = bulk
+		self.level = level
+		self.bulk_level = bulk_level
+		self.chapter_level = chapter_level
+		self.statistics = {}
+
+	def select(self, name:str, size:int=None):
+		"""
+		# Identify the compression method and level to use for the member &name.
+		# When &size is &None, the member is presumed to be large.
+		"""
+		ext = name[name.rfind('.')+1:].lower()
+
+		if ext in incompressible:
+			return (zipfile.ZIP_STORED, None)
+		if size is not None and size < self.threshold:
+			return (zipfile.ZIP_STORED, None)
+
+		if name.endswith('.chapter.txt'):
+			return (zipfile.ZIP_DEFLATED, self.chapter_level)
+		if ext == 'json' and (size is None or size >= self.bulk):
+			return (zipfile.ZIP_DEFLATED, self.bulk_level)
+
+		return (zipfile.ZIP_DEFLATED, self.level)
+
+	def record(self, info:zipfile.ZipInfo, level, elapsed:float):
+		"""
+		# Add the member described by &info to the &statistics.
+		"""
+		key = (info.compress_type, level)
+		s = self.statistics.get(key)
+		if s is None:
+			s = self.statistics[key] = [0, 0, 0, 0.0]
+
+		s[0] += 1
+		s[1] += info.file_size
+		s[2] += info.compress_size
+		s[3] += elapsed
+
+	def report(self):
+		"""
+		# Produce the lines summarizing the recorded &statistics.
+		"""
+		total = [0, 0, 0, 0.0]
+		for (method, level), s in sorted(self.statistics.items(), key=(lambda x: (x[0][0], x[0][1] or 0))):
+			mstr = 'stored' if method == zipfile.ZIP_STORED else 'deflate-' + str(level)
+			ratio = (s[2] / s[1]) if s[1] else 1.0
+			yield "%-12s %8d members %12d -> %12d bytes (%.3f) %9.3fs\n" %(mstr, s[0], s[1], s[2], ratio, s[3])
+			for i in range(4):
+				total[i] += s[i]
+
+		ratio = (total[2] / total[1]) if total[1] else 1.0
+		yield "%-12s %8d members %12d -> %12d bytes (%.3f) %9.3fs\n" %(('total',) + tuple(total[:3]) + (ratio, total[3]))
+
+# Parameters of the named policies selectable by &.bin.archive.
+policies = {
+	'fast': dict(threshold=512, level=1, bulk_level=1, chapter_level=1),
+	'balanced': dict(),
+	'compact': dict(threshold=32, level=9, bulk_level=9, chapter_level=9),
+}
+
+def compress(info:zipfile.ZipInfo, data:bytes, method, level):
+	"""
+	# Compress &data for storage as the member described by &info.
+
+	# The &info is updated with the method, sizes, and CRC of the member.
+
+	# [ Returns ]
+	# The compressed data to be written with &insert.
+	"""
+	info.compress_type = method
+	info.file_size = len(data)
+	info.CRC = zlib.crc32(data)
+
+	if method == zipfile.ZIP_DEFLATED:
+		c = zlib.compressobj(level, zlib.DEFLATED, -15)
+		cdata = c.compress(data) + c.flush()
+	elif method == zipfile.ZIP_STORED:
+		cdata = data
+	else:
+		raise ValueError("unsupported compression method: " + repr(method))
+
+	info.compress_size = len(cdata)
+	return cdata
+
+def raw(archive, name:str):
+	"""
+	# Retrieve the description and compressed data of the member &name of &archive.
+
+	# Stores other than &zipfile.ZipFile provide the operation as a `raw` method.
+
+	# [ Returns ]
+	# A pair holding the &zipfile.ZipInfo and the compressed data.
+	"""
+	if not isinstance(archive, zipfile.ZipFile):
+		return archive.raw(name)
+
+	info = archive.getinfo(name)
+	return info, rawdata(archive, info)
+
+# Fixed gzip member header: deflate, no flags, no modification time, unknown OS.
+gzip_header = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+
+def gzip(info:zipfile.ZipInfo, data:bytes):
+	"""
+	# Construct the gzip member header and trailer for the raw deflate &data
+	# of the archive member described by &info.
+
+	# [ Returns ]
+	# The triple of the header, &data, and trailer; &None if the member is not deflated.
+	"""
+	if info.compress_type != zipfile.ZIP_DEFLATED:
+		return None
+
+	trailer = struct.pack('<LL', info.CRC, info.file_size & 0xFFFFFFFF)
+	return (gzip_header, data, trailer)
+
+def encoding(chunks, size=1024*64, encoding='utf-8'):
+	"""
+	# Encode the strings produced by &chunks into blocks of at least &size bytes.
+	"""
+	buf = []
+	n = 0
+	for x in chunks:
+		buf.append(x)
+		n += len(x)
+		if n >= size:
+			yield ''.join(buf).encode(encoding)
+			buf.clear()
+			n = 0
+
+	if buf:
+		yield ''.join(buf).encode(encoding)
+
+def compress_text(info:zipfile.ZipInfo, chunks, method, level, size=1024*64):
+	"""
+	# Incrementally encode and compress the strings produced by &chunks for
+	# storage as the member described by &info.
+
+	# Only the compressed form is retained.
+
+	# [ Returns ]
+	# The compressed data to be written with &insert.
+	"""
+	if method == zipfile.ZIP_DEFLATED:
+		c = zlib.compressobj(level, zlib.DEFLATED, -15)
+	elif method == zipfile.ZIP_STORED:
+		c = None
+	else:
+		raise ValueError("unsupported compression method: " + repr(method))
+
+	crc = 0
+	total = 0
+	out = []
+	for block in encoding(chunks, size=size):
+		crc = zlib.crc32(block, crc)
+		total += len(block)
+		out.append(c.compress(block) if c is not None else block)
+	if c is not None:
+		out.append(c.flush())
+
+	cdata = b''.join(out)
+	info.compress_type = method
+	info.file_size = total
+	info.CRC = crc
+	info.compress_size = len(cdata)
+	return cdata
+
+class Pack(object):
+	"""
+	# SQLite database holding the compressed data of archive members indexed by path.
+
+	# Provides the subset of the &zipfile.ZipFile interface used by corpus readers
+	# and the &raw and &insert operations used to transfer members without
+	# recompression. Opening a pack does not load its index, and lookups are
+	# performed by the database.
+	"""
+
+	schema = (
+		"CREATE TABLE members ("
+			"name TEXT PRIMARY KEY, "
+			"method INTEGER NOT NULL, "
+			"crc INTEGER NOT NULL, "
+			"size INTEGER NOT NULL, "
+			"mtime INTEGER NOT NULL, "
+			"attributes INTEGER NOT NULL, "
+			"data BLOB NOT NULL"
+		") WITHOUT ROWID"
+	)
+
+	def __init__(self, path, mode='r'):
+		self.path = str(path)
+		self.mode = mode
+
+		if mode == 'w':
+			if os.path.exists(self.path):
+				os.unlink(self.path)
+			self.db = sqlite3.connect(self.path)
+			self.db.execute("PRAGMA journal_mode = OFF")
+			self.db.execute("PRAGMA synchronous = OFF")
+			self.db.execute(self.schema)
+		elif mode == 'r':
+			uri = 'file:' + urllib.parse.quote(self.path) + '?mode=ro'
+			self.db = sqlite3.connect(uri, uri=True, check_same_thread=False)
+		else:
+			raise ValueError("pack mode must be 'r' or 'w'")
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def close(self):
+		if self.db is None:
+			return
+
+		if self.mode == 'w':
+			self.db.commit()
+		self.db.close()
+		self.db = None
+
+	def namelist(self):
+		return [x[0] for x in self.db.execute("SELECT name FROM members")]
+
+	def raw(self, name:str):
+		"""
+		# Retrieve the description and compressed data of the member &name.
+		"""
+		r = self.db.execute(
+			"SELECT method, crc, size, mtime, attributes, data FROM members WHERE name = ?",
+			(name,)
+		).fetchone()
+		if r is None:
+			raise KeyError(name)
+
+		data = r[-1]
+		return self.describe(name, r[:-1] + (len(data),)), data
+
+	@staticmethod
+	def describe(name:str, row) -> zipfile.ZipInfo:
+		"""
+		# Construct the description of the member &name from its &row.
+		"""
+		method, crc, size, mtime, attributes, csize = row
+		info = zipfile.ZipInfo(name, time.localtime(mtime)[:6])
+		info.compress_type = method
+		info.CRC = crc
+		info.file_size = size
+		info.compress_size = csize
+		info.external_attr = attributes
+		return info
+
+	def getinfo(self, name:str) -> zipfile.ZipInfo:
+		"""
+		# Retrieve the description of the member &name without its data.
+		"""
+		r = self.db.execute(
+			"SELECT method, crc, size, mtime, attributes, length(data) FROM members WHERE name = ?",
+			(name,)
+		).fetchone()
+		if r is None:
+			raise KeyError(name)
+
+		return self.describe(name, r)
+
+	def read(self, name:str) -> bytes:
+		"""
+		# Read the inflated content of the member &name.
+		"""
+		info, data = self.raw(name)
+		if info.compress_type == zipfile.ZIP_DEFLATED:
+			data = zlib.decompress(data, -15)
+		elif info.compress_type != zipfile.ZIP_STORED:
+			raise ValueError("unsupported compression method: " + repr(info.compress_type))
+
+		if zlib.crc32(data) != info.CRC:
+			raise zipfile.BadZipFile("bad CRC-32 for member: " + name)
+		return data
+
+	def insert(self, info:zipfile.ZipInfo, data:bytes, name=None) -> zipfile.ZipInfo:
+		"""
+		# Store the member whose compressed &data is described by &info.
+		# Replaces any member of the same name.
+		"""
+		name = name or info.filename
+		mtime = int(time.mktime(info.date_time + (0, 0, -1)))
+		self.db.execute(
+			"INSERT OR REPLACE INTO members VALUES (?, ?, ?, ?, ?, ?, ?)",
+			(name, info.compress_type, info.CRC, info.file_size, mtime, info.external_attr, data)
+		)
+		return info
+
+# Name of the trailing member holding the sorted member index written by &finish.
+index_name = '.members'
+index_magic = b'CPMI'
+index_header_format = '<4sL'
+index_header_size = struct.calcsize(index_header_format)
+# Name offset and length, data offset, compressed size, size, CRC,
+# DOS date and time, external attributes, and compression method.
+index_record_format = '<LLQQQLLLH2x'
+index_record_size = struct.calcsize(index_record_format)
+# Prefix of the archive comment identifying the index's position;
+# followed by the offsets of the index and the central directory.
+index_comment = b'members '
+
+def dostime(date_time) -> int:
+	y, m, d, H, M, S = date_time
+	return ((y - 1980) << 25) | (m << 21) | (d << 16) | (H << 11) | (M << 5) | (S // 2)
+
+def dosdate(t:int):
+	return ((t >> 25) + 1980, (t >> 21) & 0xF, (t >> 16) & 0x1F, (t >> 11) & 0x1F, (t >> 5) & 0x3F, (t & 0x1F) * 2)
+
+def finish(archive, aliases=None):
+	"""
+	# Append the sorted member index to &archive and identify it in the archive comment.
+	# Must be performed after the last member has been written.
+
+	# The &aliases, a mapping of member names to the names of the members holding
+	# their content, are indexed using the data of the latter.
+
+	# Archives other than zip files are left unchanged.
+	"""
+	if not isinstance(archive, zipfile.ZipFile):
+		return
+
+	with archive._lock:
+		entries = {
+			info.filename.encode('utf-8'): (locate(archive.fp, info), info)
+			for info in archive.filelist
+		}
+
+	for name, canonical in (aliases or {}).items():
+		entries[name.encode('utf-8')] = entries[canonical.encode('utf-8')]
+
+	names = []
+	records = []
+	position = 0
+	for name in sorted(entries):
+		offset, info = entries[name]
+		records.append(struct.pack(index_record_format,
+			position, len(name), offset,
+			info.compress_size, info.file_size, info.CRC,
+			dostime(info.date_time), info.external_attr, info.compress_type,
+		))
+		names.append(name)
+		position += len(name)
+
+	data = b''.join([struct.pack(index_header_format, index_magic, len(records))] + records + names)
+	info = zipfile.ZipInfo(index_name, time.localtime(time.time())[:6])
+	info.external_attr = 0o600 << 16
+	info.compress_type = zipfile.ZIP_STORED
+	info.file_size = len(data)
+	info.CRC = zlib.crc32(data)
+
+	zi = insert(archive, info, data)
+	with archive._lock:
+		offset = locate(archive.fp, zi)
+		archive.comment = index_comment + b'%d %d' %(offset, archive.start_dir)
+
+class Mapped(object):
+	"""
+	# Memory mapped zip file read using the member index written by &finish.
+
+	# Provides the same interface as &Pack. Lookups are binary searches of the
+	# index, and the central directory is never read.
+	"""
+
+	def __init__(self, path):
+		self.path = str(path)
+		self.file = io.open(self.path, 'rb')
+		try:
+			self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+			self.index, self.count = self.identify(self.map)
+		except:
+			self.close()
+			raise
+
+		self.records = self.index + index_header_size
+		self.names = self.records + (self.count * index_record_size)
+
+	@staticmethod
+	def identify(m):
+		"""
+		# Identify the position of the member index from the archive comment.
+
+		# [ Returns ]
+		# The offset of the index and the number of members.
+		# [ Exceptions ]
+		# /LookupError/
+			# The archive does not have a valid index.
+		"""
+		eocd = m.rfind(b'PK\x05\x06', max(0, len(m) - 22 - 0xFFFF))
+		if eocd == -1:
+			raise LookupError("no end of central directory record")
+
+		cd = struct.unpack('<L', m[eocd+16:eocd+20])[0]
+		clen = struct.unpack('<H', m[eocd+20:eocd+22])[0]
+		comment = m[eocd+22:eocd+22+clen]
+		if not comment.startswith(index_comment):
+			raise LookupError("no member index")
+
+		offset, start_dir = map(int, comment[len(index_comment):].split())
+		if cd != 0xFFFFFFFF and cd != start_dir:
+			# Modified after the index was written.
+			raise LookupError("stale member index")
+
+		magic, count = struct.unpack(index_header_format, m[offset:offset+index_header_size])
+		if magic != index_magic:
+			raise LookupError("bad member index")
+
+		return offset, count
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def close(self):
+		if getattr(self, 'map', None) is not None:
+			self.map.close()
+			self.map = None
+		if self.file is not None:
+			self.file.close()
+			self.file = None
+
+	def record(self, i:int):
+		return struct.unpack_from(index_record_format, self.map, self.records + (i * index_record_size))
+
+	def name(self, i:int) -> bytes:
+		r = self.record(i)
+		start = self.names + r[0]
+		return self.map[start:start+r[1]]
+
+	def __len__(self):
+		return self.count
+
+	def __getitem__(self, i:int) -> bytes:
+		# Supports &bisect over the member names.
+		return self.name(i)
+
+	def lookup(self, name:str):
+		"""
+		# Find the index record of the member &name.
+		"""
+		key = name.encode('utf-8')
+		i = bisect.bisect_left(self, key)
+		if i == self.count or self.name(i) != key:
+			raise KeyError(name)
+		return self.record(i)
+
+	def namelist(self):
+		return [self.name(i).decode('utf-8') for i in range(self.count)]
+
+	@staticmethod
+	def describe(name:str, record) -> zipfile.ZipInfo:
+		"""
+		# Construct the description of the member &name from its index &record.
+		"""
+		no, nl, offset, csize, size, crc, t, attributes, method = record
+		info = zipfile.ZipInfo(name, dosdate(t))
+		info.compress_type = method
+		info.CRC = crc
+		info.file_size = size
+		info.compress_size = csize
+		info.external_attr = attributes
+		return info
+
+	def raw(self, name:str):
+		"""
+		# Retrieve the description and compressed data of the member &name.
+		"""
+		r = self.lookup(name)
+		offset, csize = r[2], r[3]
+		return self.describe(name, r), self.map[offset:offset+csize]
+
+	def getinfo(self, name:str) -> zipfile.ZipInfo:
+		"""
+		# Retrieve the description of the member &name from the index alone.
+		"""
+		return self.describe(name, self.lookup(name))
+
+	def read(self, name:str) -> bytes:
+		"""
+		# Read the inflated content of the member &name.
+		"""
+		no, nl, offset, csize, size, crc, t, attributes, method = self.lookup(name)
+		data = self.map[offset:offset+csize]
+
+		if method == zipfile.ZIP_DEFLATED:
+			data = zlib.decompress(data, -15)
+		elif method != zipfile.ZIP_STORED:
+			raise ValueError("unsupported compression method: " + repr(method))
+
+		if zlib.crc32(data) != crc:
+			raise zipfile.BadZipFile("bad CRC-32 for member: " + name)
+		return data
+
+# Member holding the &Aliases.names of a deduplicated archive.
+aliases_name = '.aliases.json'
+
+class Aliases(object):
+	"""
+	# Content addressed deduplication of archive members.
+
+	# Members with the same content are stored once; the names of the
+	# others are recorded as aliases of the stored member.
+
+	# [ Properties ]
+	# /members/
+		# The name of the stored member for each content digest.
+	# /names/
+		# The name of the stored member for each alias.
+	# /saved/
+		# The total size of the content of the aliases.
+	"""
+
+	def __init__(self):
+		self.members = {}
+		self.names = {}
+		self.saved = 0
+
+	@staticmethod
+	def digest(data:bytes) -> bytes:
+		return hashlib.sha256(data).digest()
+
+	def identify(self, name:str, digest:bytes, size:int):
+		"""
+		# Record &name as an alias if a member with the same content was stored.
+
+		# [ Returns ]
+		# The name of the stored member or &None if &name is the first with &digest.
+		"""
+		canonical = self.members.setdefault(digest, name)
+		if canonical == name:
+			return None
+
+		self.names[name] = canonical
+		self.saved += size
+		return canonical
+
+	def report(self):
+		"""
+		# Produce the line summarizing the deduplication performed.
+		"""
+		yield "[archive] deduplication: %d aliases of %d members, %d bytes not stored\n" %(
+			len(self.names), len(self.members), self.saved
+		)
+
+class Overlay(object):
+	"""
+	# Archive view combining a base archive with deltas holding rebuilt projects.
+
+	# The projects listed in the root `.index.json` of a delta shadow those of the
+	# base and earlier deltas entirely; members of a shadowed project that are absent
+	# from the delta are absent from the view. The root index is the combination of
+	# the layers' indexes, and the other root members are those of the base except
+	# the ones describing all of its projects, which are absent when deltas are present.
+
+	# [ Properties ]
+	# /layers/
+		# The base archive followed by the deltas in the order that they were applied.
+	# /aliases/
+		# The &Aliases.names of each layer.
+	# /owners/
+		# The index of the layer providing each project.
+	"""
+
+	# Root members describing the projects of a single layer;
+	# passed through when there are no deltas.
+	combined = {'.index.json', '.index.html', '.digests.json', aliases_name, index_name}
+
+	def __init__(self, base, deltas=()):
+		self.layers = [base] + list(deltas)
+		self.aliases = []
+		self.owners = {}
+
+		rendering = self.rendering(base)
+		entries = {}
+		for i, layer in enumerate(self.layers):
+			try:
+				self.aliases.append(json.loads(layer.read(aliases_name)))
+			except KeyError:
+				self.aliases.append({})
+
+			if i > 0:
+				r = self.rendering(layer)
+				if r is not None and r != rendering:
+					raise ValueError("delta was rendered with different parameters")
+
+			for x in json.loads(layer.read('.index.json')):
+				self.owners[x[0]] = i
+				entries[x[0]] = x
+
+		self.index = json.dumps(list(entries.values()), ensure_ascii=False).encode('utf-8')
+
+	@staticmethod
+	def rendering(layer):
+		try:
+			return json.loads(layer.read('.html.json'))
+		except KeyError:
+			return None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def close(self):
+		for x in self.layers:
+			x.close()
+
+	def apply(self, delta):
+		"""
+		# Construct a new view with &delta applied; the layers are shared.
+		"""
+		return self.__class__(self.layers[0], self.layers[1:] + [delta])
+
+	def provider(self, name:str):
+		"""
+		# Identify the layer providing the member &name.
+
+		# [ Returns ]
+		# The index of the layer and the name of the stored member within it.
+		"""
+		i = name.find('/')
+		if i == -1:
+			if name in self.combined and len(self.layers) > 1:
+				raise KeyError(name)
+			layer = 0
+		else:
+			layer = self.owners.get(name[:i], 0)
+
+		return layer, self.aliases[layer].get(name, name)
+
+	def namelist(self):
+		names = ['.index.json']
+		for i, layer in enumerate(self.layers):
+			for name in itertools.chain(layer.namelist(), self.aliases[i]):
+				try:
+					if self.provider(name) == (i, self.aliases[i].get(name, name)):
+						names.append(name)
+				except KeyError:
+					pass
+
+		return sorted(set(names))
+
+	def raw(self, name:str):
+		if name == '.index.json':
+			info = zipfile.ZipInfo(name, time.localtime(time.time())[:6])
+			info.file_size = info.compress_size = len(self.index)
+			info.CRC = zlib.crc32(self.index)
+			return info, self.index
+
+		i, member = self.provider(name)
+		return raw(self.layers[i], member)
+
+	def getinfo(self, name:str) -> zipfile.ZipInfo:
+		if name == '.index.json':
+			return self.raw(name)[0]
+
+		i, member = self.provider(name)
+		return self.layers[i].getinfo(member)
+
+	def read(self, name:str) -> bytes:
+		if name == '.index.json':
+			return self.index
+
+		i, member = self.provider(name)
+		return self.layers[i].read(member)
+
+# Suffix of the paths identifying &Pack archives.
+pack_suffix = '.pack'
+
+def open(path, mode='r'):
+	"""
+	# Open the archive at &path; a &Pack if the path has the &pack_suffix.
+
+	# Zip files are read using a &Mapped instance when they have a member index.
+	"""
+	path = str(path)
+	if path.endswith(pack_suffix):
+		return Pack(path, mode)
+
+	if mode == 'r':
+		try:
+			return Mapped(path)
+		except LookupError:
+			pass
+
+	return zipfile.ZipFile(path, mode=mode, compression=zipfile.ZIP_DEFLATED)
@@ -0,0 +1,93 @@
+import zipfile
+from fault.system import files
+from .. import store
+from ..bin import archive
+
+class Project(object):
+	def __init__(self, factor, factors):
+		self.factor = factor
+		self.identifier = 'http://example.org/' + factor
+		self.factors = factors
+
+	def select(self, type):
+		return [((x, 'python'), ((), ())) for x in self.factors]
+
+class Context(object):
+	def __init__(self, *projects):
+		self.projects = projects
+
+	def iterprojects(self):
+		return iter(self.projects)
+
+class Build(object):
+	def __init__(self, factors=('a', 'b'), **config):
+		self.variant_s = ['void/void']
+		self.ctx = Context(Project('pj', factors))
+		self.req = Context()
+		self.rendering = None
+		self.config = archive.options([])[0]
+		self.config.update(config)
+
+def test_signature_options(test):
+	"""
+	# - &archive.signature
+
+	# Check that the options changing the members of a factor
+	# change the signature and that the others do not.
+	"""
+	base = archive.signature(Build())
+	test/archive.signature(Build()) == base
+	test/archive.signature(Build(jobs=4, compact=True)) == base
+
+	for k in archive.signed:
+		test/archive.signature(Build(**{k: True})) != base
+
+def test_signature_factors(test):
+	"""
+	# - &archive.signature
+
+	# Check that the factor paths of the context change the signature.
+	"""
+	base = archive.signature(Build())
+	test/archive.signature(Build(factors=('a', 'c'))) != base
+	test/archive.signature(Build(factors=('b', 'a'))) == base
+
+def test_options(test):
+	"""
+	# - &archive.options
+	"""
+	config, argv = archive.options(['-j', '2', '-M', '-S', 'a', '-S', 'b', 'out', 'ctx'])
+	test/argv == ['out', 'ctx']
+	test/config['jobs'] == 2
+	test/config['trees'] == True
+	test/config['styles'] == ['a', 'b']
+
+	with test/ValueError as exc:
+		archive.options(['-Q', 'out', 'ctx'])
+	with test/ValueError as exc:
+		archive.options(['-j'])
+
+def test_insert_duplicates(test):
+	"""
+	# - &archive.encode
+	# - &archive.insert
+
+	# Check that members encoded by workers are deduplicated
+	# by the writer regardless of their order of arrival.
+	"""
+	d = test.exits.enter_context(files.Path.fs_tmpdir())
+	policy = store.Policy()
+	worker = store.Aliases()
+	encoded = [
+		archive.encode(policy, name, b'content' * 32, worker, omit=False)
+		for name in ('first/.meta.json', 'second/.meta.json')
+	]
+	encoded.reverse()
+
+	aliases = store.Aliases()
+	with zipfile.ZipFile(str(d/'a.zip'), mode='w') as zf:
+		written = archive.insert(zf, policy, encoded, None, aliases)
+		test/zf.namelist() == ['second/.meta.json']
+
+	test/written == ['second/.meta.json', 'first/.meta.json']
+	test/aliases.names == {'first/.meta.json': 'second/.meta.json'}
@@ -0,0 +1,183 @@
+import gc
+import json
+import random
+import weakref
+from fault.text.types import Fragment
+from fault.project import system as lsf
+from .. import join
+
+class Blocks(object):
+	"""
+	# File producing the text in blocks separated at the given offsets.
+	"""
+	def __init__(self, text, *offsets):
+		bounds = [0] + list(offsets) + [len(text)]
+		self.blocks = [text[x:y] for x, y in zip(bounds, bounds[1:]) if y > x]
+
+	def read(self, size):
+		return self.blocks.pop(0) if self.blocks else ''
+
+document = '{"a": ["x,]", "q\\\\", "e\\"s,}" , ], "r": "Match a{1,} or [a,]", "d": [1, 2,\n],}'
+expected = {
+	"a": ["x,]", "q\\", "e\"s,}"],
+	"r": "Match a{1,} or [a,]",
+	"d": [1, 2],
+}
+
+def test_Stream_trailing_commas(test):
+	"""
+	# - &join.load
+	# - &join.Stream
+
+	# Check that only the commas outside of strings are removed regardless
+	# of where the document is split into blocks.
+	"""
+	for i in range(len(document) + 1):
+		test/join.load(Blocks(document, i)) == expected
+
+	for i in range(len(document) + 1):
+		for j in range(i, len(document) + 1):
+			test/json.loads(join.Stream(Blocks(document, i, j)).all()) == expected
+
+def test_Stream_valid(test):
+	"""
+	# - &join.Stream
+
+	# Check that valid documents are decoded unchanged.
+	"""
+	valid = json.dumps(expected)
+	for i in range(len(valid) + 1):
+		test/join.load(Blocks(valid, i)) == expected
+
+def test_Elements_blocks(test):
+	"""
+	# - &join.Elements
+
+	# Check that the subnodes and attributes are decoded regardless of the block boundaries.
+	"""
+	text = '["module", [["a", [], {"identifier": "x,]"},], ["b", [], {},],], {"k": "v,}",},]'
+	for i in range(len(text) + 1):
+		e = join.Elements(Blocks(text, i))
+		test/list(e) == [["a", [], {"identifier": "x,]"}], ["b", [], {}]]
+		test/e.attributes == {"k": "v,}"}
+
+def tree(depth, breadth, vocabulary, rng):
+	if depth == 0:
+		return []
+	return [
+		('class', tree(depth - 1, breadth, vocabulary, rng), {'identifier': 'i%d' %(rng.randrange(vocabulary),)})
+		for i in range(breadth)
+	]
+
+def test_locate_find(test):
+	"""
+	# - &join.locate
+	# - &join.find
+	# - &join.CompactIndex
+
+	# Check that &join.locate and &join.find agree using both index types
+	# when identifiers are repeated among siblings and throughout the tree.
+	"""
+	rng = random.Random(0)
+
+	for vocabulary in (3, 10, 100):
+		root = ('module', tree(5, 3, vocabulary, rng), {})
+		idx = join.index(root)
+		compact = join.CompactIndex(root)
+		paths = list(idx)
+
+		for i in range(500):
+			path = rng.choice(paths)
+			rpath = rng.choice(paths)[rng.randrange(3):][:2] or ('i0',)
+
+			expected = join.find(idx, path, rpath)
+			test/join.locate(idx, path, rpath) == expected
+			test/join.locate(compact, path, rpath) == expected
+			test/join.find(compact, path, rpath) == expected
+
+def test_CompactIndex_equivalence(test):
+	"""
+	# - &join.CompactIndex
+	# - &join.index
+
+	# Check that the entries and occurrences of the indexes are the same.
+	"""
+	rng = random.Random(1)
+	root = ('module', tree(4, 4, 6, rng), {})
+	idx = join.index(root)
+	compact = join.CompactIndex(root)
+
+	test/len(compact) == len(idx)
+	for path, (node, subnodes) in idx.items():
+		test/(path in compact) == True
+		entry = compact[path]
+		test/(entry[0] is node) == True
+		test/set(entry[1]) == subnodes
+
+	for k, paths in idx.occurrences.items():
+		if paths:
+			test/list(compact.occurrences[k]) == list(paths)
+	test/compact.occurrences.get('absent') == None
+
+class Context(object):
+	"""
+	# Context without projects.
+	"""
+	def iterprojects(self):
+		return iter(())
+
+	def split(self, path):
+		raise LookupError(path)
+
+class Project(object):
+	factor = lsf.types.factor@'project'
+
+	def itercontexts(self):
+		return iter(())
+
+	def split(self, path):
+		return None
+
+def test_Resolution_invalid(test):
+	"""
+	# - &join.Resolution.resolve
+
+	# Check that invalid references of every kind are counted, cached or not.
+	"""
+	ctx = Context()
+	rr = join.Resolution(ctx, ctx, Project(), lsf.types.factor@'project.factor')
+	rr.add_index(('module', [('class', [], {'identifier': 'C'})], {}))
+
+	def resolve(reference):
+		return rr.resolve((), Fragment(('reference/ambiguous', reference)))
+
+	invalid = {
+		'Missing': ['invalid', 'unknown'],
+		'@absent.factor': ['none', 'invalid'],
+		'..absent': ['none', 'invalid'],
+	}
+	for i in range(2):
+		for reference, typepath in invalid.items():
+			test/resolve(reference).typepath[2:] == typepath
+
+		test/resolve('C').typepath[2:] == ['factor-local', 'class']
+		test/resolve('.factor').typepath[2] == 'project-local'
+
+	test/rr.statistics['invalid'] == 2 * len(invalid)
+	test/rr.statistics['hits'] == 2 + len(invalid)
+
+def test_symbols_release(test):
+	"""
+	# - &join.symbols
+
+	# Check that the tables are shared per context and do not retain it.
+	"""
+	ctx = Context()
+	s = join.symbols(ctx)
+	test/(join.symbols(ctx) is s) == True
+	test/(join.symbols(Context()) is s) == False
+
+	ref = weakref.ref(ctx)
+	del ctx
+	gc.collect()
+	test/ref() == None
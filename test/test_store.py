@@ -0,0 +1,123 @@
+import json
+import zipfile
+from fault.system import files
+from .. import store
+
+def write(path, members, aliases=None):
+	"""
+	# Write an archive at &path holding &members and finish it with &aliases.
+	"""
+	with store.open(path, mode='w') as arc:
+		for name, data in members.items():
+			info = zipfile.ZipInfo(name, (2020, 1, 1, 0, 0, 0))
+			cdata = store.compress(info, data, zipfile.ZIP_DEFLATED, 6)
+			store.insert(arc, info, cdata)
+		store.finish(arc, aliases)
+	return path
+
+def test_Mapped_index(test):
+	"""
+	# - &store.finish
+	# - &store.Mapped
+	"""
+	d = test.exits.enter_context(files.Path.fs_tmpdir())
+	path = write(str(d/'a.zip'), {'b': b'second', 'a': b'first' * 64}, {'c': 'a'})
+
+	with store.open(path) as arc:
+		test.isinstance(arc, store.Mapped)
+		test/arc.namelist() == ['a', 'b', 'c']
+		test/arc.read('a') == b'first' * 64
+		test/arc.read('c') == b'first' * 64
+		test/arc.getinfo('b').file_size == len(b'second')
+		test/arc.getinfo('a').compress_type == zipfile.ZIP_DEFLATED
+
+		info, data = arc.raw('a')
+		test/info.compress_size == len(data)
+		with test/KeyError as exc:
+			arc.read('absent')
+
+	# Remains a valid zip file.
+	with zipfile.ZipFile(path) as zf:
+		test/zf.read('b') == b'second'
+
+def test_Mapped_stale(test):
+	"""
+	# - &store.open
+	# - &store.Mapped.identify
+
+	# Check that an index is not used once the archive has been modified.
+	"""
+	d = test.exits.enter_context(files.Path.fs_tmpdir())
+	path = write(str(d/'a.zip'), {'a': b'first'})
+	with zipfile.ZipFile(path, mode='a') as zf:
+		zf.writestr('b', b'second')
+
+	with store.open(path) as arc:
+		test.isinstance(arc, zipfile.ZipFile)
+		test/arc.read('b') == b'second'
+
+def test_Pack(test):
+	"""
+	# - &store.Pack
+	# - &store.transfer
+	"""
+	d = test.exits.enter_context(files.Path.fs_tmpdir())
+	path = write(str(d/'a.pack'), {'b': b'second', 'a': b'first' * 64})
+
+	with store.open(path) as arc:
+		test.isinstance(arc, store.Pack)
+		test/arc.namelist() == ['a', 'b']
+		test/arc.read('a') == b'first' * 64
+		test/arc.getinfo('a').file_size == len(b'first' * 64)
+
+		with store.open(str(d/'b.zip'), mode='w') as target:
+			store.transfer(arc, target, 'a', rename='c')
+			store.finish(target)
+
+	with store.open(str(d/'b.zip')) as arc:
+		test/arc.read('c') == b'first' * 64
+
+def layer(path, projects, members, aliases=None):
+	members = dict(members)
+	members['.index.json'] = json.dumps([[x, x, None, '', ''] for x in projects]).encode('utf-8')
+	members['.digests.json'] = b'{}'
+	if aliases:
+		members[store.aliases_name] = json.dumps(aliases).encode('utf-8')
+	return store.open(write(path, members, aliases))
+
+def test_Overlay(test):
+	"""
+	# - &store.Overlay
+	"""
+	d = test.exits.enter_context(files.Path.fs_tmpdir())
+	base = layer(str(d/'base.zip'), ['p', 'q'], {'p/x': b'px', 'q/y': b'qy', 'root': b'r'})
+	delta = layer(str(d/'delta.zip'), ['p'], {'p/z': b'pz'}, {'p/w': 'p/z'})
+
+	with store.Overlay(base, [delta]) as ov:
+		test/ov.read('p/z') == b'pz'
+		test/ov.read('p/w') == b'pz'
+		test/ov.read('q/y') == b'qy'
+		test/ov.read('root') == b'r'
+		test/[x[0] for x in json.loads(ov.read('.index.json'))] == ['p', 'q']
+
+		# Shadowed project and the root members describing a single layer.
+		with test/KeyError as exc:
+			ov.read('p/x')
+		with test/KeyError as exc:
+			ov.read('.digests.json')
+
+		test/ov.namelist() == ['.index.json', 'p/w', 'p/z', 'q/y', 'root']
+
+def test_Overlay_single(test):
+	"""
+	# - &store.Overlay
+
+	# Check that the root members of the base pass through without deltas.
+	"""
+	d = test.exits.enter_context(files.Path.fs_tmpdir())
+	base = layer(str(d/'base.zip'), ['p'], {'p/x': b'px'})
+
+	with store.Overlay(base) as ov:
+		test/ov.read('.digests.json') == b'{}'
+		test/ov.read('p/x') == b'px'
+		test/('.digests.json' in ov.namelist()) == True
@@ -0,0 +1,29 @@
+import marshal
+from .. import tools
+from fault.text.types import Paragraph, Fragment
+
+def test_serialize(test):
+	"""
+	# - &tools.serialize
+	# - &tools.deserialize
+	"""
+	p = Paragraph([Fragment(('text/normal', 'x')), Fragment(('literal/grave-accent', 'y'))])
+	tree = ('chapter', [('paragraph', p, {'identifier': 'i'})], {})
+
+	r = tools.deserialize(tools.serialize(tree))
+	test/r == tree
+	test.isinstance(r[1][0][1], Paragraph)
+	test.isinstance(r[1][0][1][0], Fragment)
+
+def test_deserialize_classes(test):
+	"""
+	# - &tools.deserialize
+
+	# Check that only the element tree classes are instantiated.
+	"""
+	data = marshal.dumps((tools.tree_format, (tools._instance, 'os:system', 'true')))
+	with test/ValueError as exc:
+		tools.deserialize(data)
+
+	with test/TypeError as exc:
+		tools.serialize(('chapter', [], {'x': set()}))
@@ -2,7 +2,9 @@
 # Element tree (text) queries and tools relevant to factor rendering.
 """
 import typing
+import marshal
 from fault.text import document
+from fault.text import nodes
 from fault.text.types import Paragraph, Fragment
 
 def select(types:set, nodes:typing.Iterable):
@@ -74,3 +76,88 @@ def fragment_property(item) -> Fragment:
 		# Qualify the cast with &pi.
 		reftype = [rt, rs, k[0]] + suffix
 		return Fragment(('/'.join(reftype), v.data))
+
+# Version of the &serialize format.
+tree_format = 1
+# Leading item of the tuples representing instances of subclasses of builtin types.
+_instance = b'\x00instance'
+_scalars = {str, int, float, bool, type(None)}
+_bases = (tuple, list, dict, str)
+# The subclasses of builtin types that may be present in element trees;
+# stored names are resolved using this mapping alone.
+_classes = {
+	c.__module__ + ':' + c.__qualname__: c
+	for c in (Paragraph, Fragment)
+}
+
+def _encode(obj):
+	t = type(obj)
+	if t in _scalars:
+		return obj
+	elif t is tuple:
+		return tuple(map(_encode, obj))
+	elif t is list:
+		return list(map(_encode, obj))
+	elif t is dict:
+		return {k: _encode(v) for k, v in obj.items()}
+
+	# Subclasses such as &Paragraph and &Fragment.
+	name = t.__module__ + ':' + t.__qualname__
+	if name in _classes:
+		for base in _bases:
+			if isinstance(obj, base):
+				return (_instance, name, _encode(base(obj)))
+
+	raise TypeError("cannot serialize element tree object of type " + repr(t))
+
+def _class(name):
+	try:
+		return _classes[name]
+	except KeyError:
+		raise ValueError("unsupported element tree object type: " + repr(name))
+
+def _decode(obj):
+	t = type(obj)
+	if t is tuple:
+		if obj[:1] == (_instance,):
+			return _class(obj[1])(_decode(obj[2]))
+		return tuple(map(_decode, obj))
+	elif t is list:
+		return list(map(_decode, obj))
+	elif t is dict:
+		return {k: _decode(v) for k, v in obj.items()}
+
+	return obj
+
+def serialize(tree) -> bytes:
+	"""
+	# Serialize the element &tree of a parsed chapter using &marshal.
+	# Instances of &Paragraph and &Fragment are stored with their class name.
+	"""
+	return marshal.dumps((tree_format, _encode(tree)))
+
+def deserialize(data:bytes):
+	"""
+	# Reconstruct the element tree serialized by &serialize.
+
+	# Raises &ValueError when &data names a class other than &Paragraph or &Fragment.
+	"""
+	version, tree = marshal.loads(data)
+	if version != tree_format:
+		raise ValueError("unsupported element tree format: " + repr(version))
+	return _decode(tree)
+
+def parse(chapter:str):
+	"""
+	# Parse the &chapter text into its element tree.
+	"""
+	r, = nodes.Cursor.from_chapter_text(chapter).root
+	return r
+
+def cursor(chapter):
+	"""
+	# Construct the &nodes.Cursor of &chapter text or an element tree produced by &parse.
+	"""
+	if isinstance(chapter, str):
+		return nodes.Cursor.from_chapter_text(chapter)
+	return nodes.Cursor.from_chapter_content(chapter)